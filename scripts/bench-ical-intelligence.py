@@ -0,0 +1,829 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks for the iCal Token Intelligence pipeline
+
+Each case checks its fast path against the reference implementation
+(or the synthetic input's known contents) before timing it, and exits
+non-zero on any mismatch (or, for startup, when 'status' misses its time
+budget).
+
+The ingest, transcripts and pipeline cases generate synthetic .ics
+calendars and JSONL transcripts of --n events/lines; they stream to disk,
+so 1M-scale runs need disk space rather than memory.
+
+Usage:
+    python scripts/bench-ical-intelligence.py                  # all cases
+    python scripts/bench-ical-intelligence.py batch --n 100000
+    python scripts/bench-ical-intelligence.py ingest --n 1000000 --profile
+    python scripts/bench-ical-intelligence.py team             # 10k-session team plan < 500 ms
+    python scripts/bench-ical-intelligence.py startup          # cold 'status' < 30 ms
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from ical_intelligence import cli, profiling
+from ical_intelligence.batch import budget_rollups
+from ical_intelligence.calibration import SETTLE_SECONDS, Calibrator, RateModel
+from ical_intelligence.ingest import CalendarIngestor
+from ical_intelligence.planner import plan_team, quota_weight
+from ical_intelligence.recurrence import expand, iter_rule, parse_rrule
+from ical_intelligence.snapshot import publish_status, read_snapshot, snapshot_path
+from ical_intelligence.store import EventStore
+from ical_intelligence.tags import _extract, parse_tags
+from ical_intelligence.usage import HOUR, UsageAggregator
+
+log = cli.log
+
+# Cold-start budget for 'ical-intelligence.py status' (shell prompts, editor hooks)
+STARTUP_BUDGET_MS = 30.0
+
+# Prediction + scheduling budget per 10k sessions in a week for 'plan --team'
+TEAM_BUDGET_MS = 500.0
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def bench_batch(n: int) -> bool:
+    """Scalar predict_session_tokens + estimate_cost loop vs. the batch path, with and without calibration"""
+    rng = random.Random(42)
+    bridge = cli.iCalTokenBridge()
+    complexities_pool = list(bridge.token_rates)
+
+    durations = [rng.choice([0.25, 0.5, 1, 1.5, 2, 3, 4]) + rng.random() for _ in range(n)]
+    complexities = [rng.choice(complexities_pool) for _ in range(n)]
+    explicit = [rng.choice([5, 20, 45, 120]) * 1000 if rng.random() < 0.1 else None for _ in range(n)]
+    projects = [rng.choice([None, 'hub', 'organized-ai']) for _ in range(n)]
+    starts = [1760000000 + rng.randrange(0, 14 * 86400) for _ in range(n)]
+
+    sessions = []
+    for duration, complexity, tokens, project, start in zip(durations, complexities, explicit, projects, starts):
+        metadata = {'complexity': complexity}
+        if project is not None:
+            metadata['project'] = project
+        if tokens is not None:
+            metadata['explicit_tokens'] = tokens
+        sessions.append({'duration_hours': duration, 'metadata': metadata, 'start_ts': start, 'series': None})
+
+    # One block of ten sessions in five becomes a daily series at 07:00 and
+    # 20:00 (local), so its occurrences fall in different time-of-day buckets
+    day = int(datetime(2026, 6, 8).timestamp())
+    for first in range(0, n - 9, 50):
+        for offset in range(10):
+            hour = 7 if offset % 2 == 0 else 20
+            sessions[first + offset] = dict(sessions[first], series=first,
+                                            start_ts=day + (offset // 2) * 86400 + hour * 3600)
+
+    def scalar():
+        rows = []
+        for session in sessions:
+            prediction = bridge.predict_session_tokens(session['duration_hours'], session['metadata'], session['start_ts'])
+            rows.append((prediction['base'], prediction['buffer'], prediction['max'],
+                         prediction['confidence'], bridge.estimate_cost(prediction['base'], 'sonnet')))
+        return rows
+
+    fitted = RateModel({'rates': {
+        'complexity': {'low': [7321.5, 0.81], 'high': [12004.2, 0.66]},
+        'projects': {'hub|medium': [16873.9, 0.9], 'organized-ai|high': [21003.3, 0.74]},
+        'time_of_day': {'early': 1.18, 'evening': 0.83},
+    }})
+    for label, rate_model in (('rules', None), ('calibrated', fitted)):
+        bridge._rate_model, bridge._rate_model_loaded = rate_model, True
+        rows, scalar_seconds = timed(scalar)
+        columns, batch_seconds = timed(bridge.predict_sessions, sessions, 'sonnet')
+
+        for index, row in enumerate(rows):
+            got = (int(columns['base'][index]), int(columns['buffer'][index]), int(columns['max'][index]),
+                   float(columns['confidence'][index]), float(columns['cost'][index]))
+            if got != row:
+                log(f"❌ batch mismatch ({label}) at row {index}: scalar={row} batch={got}", 'red')
+                return False
+
+        log(f"batch  n={n:,} ({label})", 'bold')
+        log(f"   scalar: {scalar_seconds * 1000:8.1f} ms", 'cyan')
+        log(f"   batch:  {batch_seconds * 1000:8.1f} ms  ({scalar_seconds / batch_seconds:.1f}x)", 'green')
+    return True
+
+
+def legacy_parse_session_metadata(event_title: str, description: str = '') -> dict:
+    """The original multi-search parse_session_metadata, kept as the reference"""
+    full_text = f"{event_title} {description}".lower()
+    metadata = {}
+
+    complexity_match = re.search(r'#complexity:(low|medium|high|critical)', full_text)
+    if complexity_match:
+        metadata['complexity'] = complexity_match.group(1)
+    else:
+        if any(word in full_text for word in ['simple', 'fix', 'tweak', 'update']):
+            metadata['complexity'] = 'low'
+        elif any(word in full_text for word in ['complex', 'architecture', 'design', 'critical']):
+            metadata['complexity'] = 'high'
+        else:
+            metadata['complexity'] = 'medium'
+
+    project_match = re.search(r'#project:(\S+)', full_text)
+    if project_match:
+        metadata['project'] = project_match.group(1)
+
+    token_match = re.search(r'#tokens:(\d+)([km]?)', full_text)
+    if token_match:
+        value = int(token_match.group(1))
+        unit = token_match.group(2)
+        if unit == 'k':
+            value *= 1000
+        elif unit == 'm':
+            value *= 1000000
+        metadata['explicit_tokens'] = value
+
+    agent_match = re.search(r'#agents:([a-z,]+)', full_text)
+    if agent_match:
+        metadata['suggested_agents'] = agent_match.group(1).split(',')
+
+    return metadata
+
+
+# Fragments that exercise tag/keyword overlaps, invalid values, case and folding
+_TEXT_FRAGMENTS = [
+    '#complexity:', '#COMPLEXITY:', '#project:', '#tokens:', '#agents:', '#', ':', ',', ' ', '\t', '\n',
+    'low', 'medium', 'high', 'critical', 'HIGH', 'lowish', 'xyz', 'k', 'm', 'K', '45', '0', '007',
+    'simple', 'fix', 'prefix', 'tweak', 'update', 'complex', 'architecture', 'design', 'Design',
+    'claude', 'droid', 'claude,droid', ',,', 'organized-ai', 'oauth', 'é', 'İ', '-', '#project:#tokens:5k',
+    '#model:', 'opus', 'Sonnet',
+]
+
+
+def random_event_text(rng: random.Random) -> str:
+    return ''.join(rng.choice(_TEXT_FRAGMENTS) for _ in range(rng.randint(0, 12)))
+
+
+def bench_tags(n: int) -> bool:
+    """Property check vs. the legacy parser, then recurring and all-unique throughput (fails if uncached is slower)"""
+    rng = random.Random(7)
+    for _ in range(max(n // 5, 20000)):
+        title, description = random_event_text(rng), random_event_text(rng)
+        expected = legacy_parse_session_metadata(title, description)
+        got = parse_tags(title, description)
+        # #model: postdates the legacy parser; it must not disturb the other tags
+        got.pop('model', None)
+        if got != expected:
+            log(f"❌ tag mismatch for {title!r} / {description!r}: legacy={expected} new={got}", 'red')
+            return False
+
+    # Recurring calendars: a few hundred distinct texts repeated across n events
+    distinct = [(f"Session {i} #complexity:{rng.choice(['low', 'high'])} #project:p{i % 20}",
+                 f"{rng.choice(['fix the build', 'design review', 'pairing'])} #agents:claude,droid")
+                for i in range(300)]
+    events = [rng.choice(distinct) for _ in range(n)]
+
+    # Unique texts (nothing for the memo to reuse): tagged sessions and plain meetings
+    unique = [(f"{t} {i}", d) if i % 2 else (f"{rng.choice(_UNTAGGED)} with the team {i}", rng.choice(['', d]))
+              for i, (t, d) in enumerate(events)]
+
+    def cold():
+        _extract.cache_clear()
+        return [parse_tags(t, d) for t, d in unique]
+
+    _, legacy_seconds = timed(lambda: [legacy_parse_session_metadata(t, d) for t, d in events])
+    _extract.cache_clear()
+    _, new_seconds = timed(lambda: [parse_tags(t, d) for t, d in events])
+    # Best of three, so a scheduling hiccup does not fail the comparison
+    legacy_unique_seconds = min(timed(lambda: [legacy_parse_session_metadata(t, d) for t, d in unique])[1]
+                                for _ in range(3))
+    cold_seconds = min(timed(cold)[1] for _ in range(3))
+
+    log(f"tags   n={n:,} (equivalence checked on {max(n // 5, 20000):,} random texts)", 'bold')
+    log(f"   recurring  legacy: {legacy_seconds * 1000:8.1f} ms", 'cyan')
+    log(f"              memo:   {new_seconds * 1000:8.1f} ms  ({legacy_seconds / new_seconds:.1f}x)", 'green')
+    ok = cold_seconds <= legacy_unique_seconds
+    log(f"   all unique legacy: {legacy_unique_seconds * 1000:8.1f} ms", 'cyan')
+    log(f"              cold:   {cold_seconds * 1000:8.1f} ms  ({legacy_unique_seconds / cold_seconds:.1f}x)",
+        'green' if ok else 'red')
+    if not ok:
+        log("❌ uncached tag extraction is slower than the legacy parser", 'red')
+    return ok
+
+
+_RULE_PARTS = [
+    'FREQ=DAILY', 'FREQ=DAILY;INTERVAL=3', 'FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR', 'FREQ=WEEKLY',
+    'FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH', 'FREQ=WEEKLY;BYDAY=SU;WKST=SU', 'FREQ=MONTHLY',
+    'FREQ=MONTHLY;BYMONTHDAY=-1', 'FREQ=MONTHLY;BYDAY=2MO', 'FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1',
+    'FREQ=YEARLY', 'FREQ=YEARLY;BYMONTH=3,11;BYDAY=1SU', 'FREQ=MONTHLY;INTERVAL=2;BYMONTHDAY=29,30,31',
+    'FREQ=DAILY;BYHOUR=9,15', 'FREQ=WEEKLY;BYDAY=MO,WE;BYHOUR=8,20;BYMINUTE=15,45',
+    'FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYHOUR=9,17;BYSETPOS=-1',
+]
+_TZIDS = [None, 'UTC', 'America/New_York', 'Europe/Berlin', 'Australia/Lord_Howe']
+
+
+def eager_expand(start, tzid, rrule, duration, window_start, window_end):
+    """Reference: walk the series from DTSTART and filter, as an eager expander would"""
+    starts = []
+    for occurrence in iter_rule(start, tzid, parse_rrule(rrule, tzid)):
+        if occurrence >= window_end:
+            break
+        if occurrence + duration > window_start or occurrence >= window_start:
+            starts.append(occurrence)
+    return tuple(starts)
+
+
+def bench_recurrence(n: int) -> bool:
+    """Windowed expansion vs. expanding from DTSTART, then repeated week queries"""
+    rng = random.Random(11)
+    origin = 1700000000
+    series = []
+    for _ in range(n):
+        rrule = rng.choice(_RULE_PARTS)
+        if rng.random() < 0.3:
+            rrule += rng.choice([';COUNT=25', ';COUNT=400', ';UNTIL=20260615', ';UNTIL=20270101T000000Z'])
+        start = origin + rng.randrange(0, 2 * 365 * 86400) // 900 * 900
+        series.append((start, rng.choice(_TZIDS), rrule, rng.choice([0, 1800, 3600, 7200, 86400 * 2])))
+
+    windows = []
+    for start, tzid, rrule, duration in series:
+        window_start = start + rng.randrange(-30, 3 * 365) * 86400 + rng.randrange(0, 86400)
+        windows.append((window_start, window_start + rng.choice([86400, 7 * 86400])))
+
+    # Fixed expectations: BYHOUR expands within each day; parts we do not
+    # implement fall back to DTSTART instead of being ignored
+    monday = int(datetime(2026, 6, 8, 9, tzinfo=timezone.utc).timestamp())
+    fixed = [
+        ('FREQ=DAILY;BYHOUR=9,15', (0, 6, 24, 30)),
+        ('FREQ=DAILY;BYHOUR=9;BYMINUTE=0,30;COUNT=3', (0, 0.5, 24)),
+        ('FREQ=YEARLY;BYWEEKNO=24', (0,)),
+        ('FREQ=DAILY;BYYEARDAY=1,100', (0,)),
+    ]
+    for rrule, hours in fixed:
+        expected = tuple(monday + int(hour * 3600) for hour in hours)
+        got = expand(monday, 'UTC', rrule, 1800, monday, monday + 2 * 86400)
+        if got != expected:
+            log(f"❌ {rrule}: expected {expected}, got {got}", 'red')
+            return False
+
+    expand.cache_clear()
+    for (start, tzid, rrule, duration), (window_start, window_end) in zip(series, windows):
+        expected = eager_expand(start, tzid, rrule, duration, window_start, window_end)
+        got = expand(start, tzid, rrule, duration, window_start, window_end)
+        if got != expected:
+            log(f"❌ recurrence mismatch for {rrule} tz={tzid} dtstart={start} "
+                f"window=[{window_start}, {window_end}): eager={expected} lazy={got}", 'red')
+            return False
+
+    # Far-future week queries: eager cost grows with the series age, lazy does not
+    queries = [(s, w[0] + 365 * 86400, w[1] + 365 * 86400) for s, w in zip(series, windows)]
+    _, eager_seconds = timed(lambda: [eager_expand(*s, a, b) for s, a, b in queries])
+    expand.cache_clear()
+    _, lazy_seconds = timed(lambda: [expand(*s, a, b) for s, a, b in queries])
+    _, cached_seconds = timed(lambda: [expand(*s, a, b) for s, a, b in queries])
+
+    log(f"rrule  n={n:,} series (checked against expansion from DTSTART)", 'bold')
+    log(f"   eager:  {eager_seconds * 1000:8.1f} ms", 'cyan')
+    log(f"   lazy:   {lazy_seconds * 1000:8.1f} ms  ({eager_seconds / lazy_seconds:.1f}x)", 'green')
+    log(f"   cached: {cached_seconds * 1000:8.1f} ms  ({eager_seconds / cached_seconds:.1f}x, same windows again)", 'green')
+    return True
+
+
+def _fold(line: str) -> str:
+    """RFC 5545 line folding at 75 octets (generated text is ASCII)"""
+    return line[:75] + ''.join('\r\n ' + line[i:i + 74] for i in range(75, len(line), 74))
+
+
+def _ics_time(epoch: int, tzid: Optional[str]) -> str:
+    if tzid is None:
+        return ':' + datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    return f";TZID={tzid}:" + datetime.fromtimestamp(epoch, ZoneInfo(tzid)).strftime('%Y%m%dT%H%M%S')
+
+
+_PROJECTS = ['organized-ai', 'hub', 'billing', 'mobile-app', 'infra', 'docs']
+_UNTAGGED = ['Standup', 'Lunch', '1:1', 'Planning poker', 'Focus time', 'Interview loop']
+
+
+def write_synthetic_calendar(path: Path, n: int, first: int, span: int, seed: int = 3) -> Dict[str, int]:
+    """
+    Stream n VEVENTs starting in [first, first + span) to an .ics file
+
+    About 70% carry session tags, 5% are weekly series (COUNT=10), 2% are
+    all-day, and events mix UTC, floating and TZID times with folded
+    descriptions. Returns counts of what was written.
+    """
+    rng = random.Random(seed)
+    tzids = [None, 'UTC', 'America/New_York', 'Europe/Berlin', 'Asia/Tokyo']
+    counts = {'events': 0, 'tagged': 0, 'recurring': 0, 'all_day': 0}
+    with open(path, 'w', newline='') as fp:
+        fp.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench-ical-intelligence//EN\r\n')
+        for index in range(n):
+            start = first + rng.randrange(0, span // 900) * 900
+            tagged = rng.random() < 0.7
+            if tagged:
+                title = (f"Session {index} #complexity:{rng.choice(['low', 'medium', 'high', 'critical'])}"
+                         f" #project:{rng.choice(_PROJECTS)}")
+                if rng.random() < 0.1:
+                    title += f" #tokens:{rng.choice([5, 20, 45, 120])}k"
+            else:
+                title = f"{rng.choice(_UNTAGGED)} {index}"
+            description = ' '.join(rng.choice(['refactor', 'review', 'the', 'pipeline', 'oauth', 'flow', 'tests',
+                                               'migrate', 'schema', 'ship']) for _ in range(rng.randint(0, 40)))
+
+            lines = ['BEGIN:VEVENT', f'UID:bench-{index}@example.com', f'SUMMARY:{title}']
+            if rng.random() < 0.02:
+                day = datetime.fromtimestamp(start, timezone.utc).strftime('%Y%m%d')
+                lines += [f'DTSTART;VALUE=DATE:{day}']
+                counts['all_day'] += 1
+            else:
+                tzid = rng.choice(tzids)
+                end = start + rng.choice([1800, 3600, 5400, 7200, 10800, 14400])
+                lines += [f'DTSTART{_ics_time(start, tzid)}', f'DTEND{_ics_time(end, tzid)}']
+                counts['tagged'] += tagged
+                if rng.random() < 0.05:
+                    lines.append('RRULE:FREQ=WEEKLY;COUNT=10')
+                    counts['recurring'] += 1
+            if description:
+                lines.append(f'DESCRIPTION:{description}')
+            lines.append('END:VEVENT')
+            fp.write(''.join(_fold(line) + '\r\n' for line in lines))
+            counts['events'] += 1
+        fp.write('END:VCALENDAR\r\n')
+    return counts
+
+
+# Fields of a one-off timed event as the ingestor stores it
+_REPRO_EVENT = {'description': '', 'tzid': None, 'all_day': False, 'rrule': None, 'exdate': [],
+                'rdate': [], 'recurrence_id': None, 'cancelled': False}
+
+_MODELS = ['claude-sonnet-4-5-20250929', 'claude-opus-4-1-20250805', 'claude-haiku-4-5-20251001']
+
+
+def write_synthetic_transcripts(projects_dir: Path, n: int, now: float, seed: int = 5,
+                                lines_per_file: int = 5000, expected: Optional[Dict] = None) -> Dict:
+    """
+    Append n transcript lines across project directories (Claude Code layout)
+
+    About 60% are assistant lines with usage; the rest are user messages,
+    tool results, summaries and malformed assistant lines (numeric
+    timestamps, non-dict usage, non-numeric counts) that the aggregator
+    must skip. Timestamps
+    fall in the two weeks before now. Returns the expected records and
+    tokens per model (added to expected when given).
+    """
+    rng = random.Random(seed)
+    expected = expected if expected is not None else {'records': 0, 'tokens': {}}
+    files = max(1, -(-n // lines_per_file))
+    written = 0
+    for file_index in range(files):
+        project = projects_dir / f'-Users-me-code-{_PROJECTS[file_index % len(_PROJECTS)]}'
+        project.mkdir(parents=True, exist_ok=True)
+        with open(project / f'session-{file_index}.jsonl', 'a') as fp:
+            for _ in range(min(lines_per_file, n - written)):
+                stamp = datetime.fromtimestamp(now - rng.random() * 14 * 86400, timezone.utc)
+                timestamp = stamp.strftime('%Y-%m-%dT%H:%M:%S.') + f'{stamp.microsecond // 1000:03d}Z'
+                kind = rng.random()
+                if kind < 0.6:
+                    model = rng.choice(_MODELS)
+                    usage = {'input_tokens': rng.randint(1, 4000), 'output_tokens': rng.randint(1, 2000),
+                             'cache_read_input_tokens': rng.randint(0, 50000)}
+                    entry = {'type': 'assistant', 'timestamp': timestamp, 'sessionId': f's{file_index}',
+                             'message': {'model': model, 'role': 'assistant', 'usage': usage,
+                                         'content': [{'type': 'text', 'text': 'x' * rng.randint(10, 300)}]}}
+                    expected['records'] += 1
+                    expected['tokens'][model] = (expected['tokens'].get(model, 0)
+                                                 + usage['input_tokens'] + usage['output_tokens'])
+                elif kind < 0.85:
+                    entry = {'type': 'user', 'timestamp': timestamp,
+                             'message': {'role': 'user', 'content': 'please fix the "usage" report ' * rng.randint(1, 5)}}
+                elif kind < 0.93:
+                    entry = {'type': 'user', 'timestamp': timestamp, 'toolUseResult': {'stdout': 'ok\n' * rng.randint(1, 50)}}
+                elif kind < 0.95:
+                    entry = {'type': 'assistant', 'timestamp': timestamp,
+                             'message': {'model': _MODELS[0], 'usage': {'input_tokens': 10, 'output_tokens': 5}}}
+                    entry.update(rng.choice([{'timestamp': int(now)}, {'message': {'usage': [10, 5]}},
+                                             {'message': {'usage': {'input_tokens': 'ten'}}}]))
+                else:
+                    entry = {'type': 'summary', 'summary': 'Refactored the pipeline', 'leafUuid': f'u{written}'}
+                fp.write(json.dumps(entry, separators=(',', ':')) + '\n')
+                written += 1
+    return expected
+
+
+def bench_ingest(n: int) -> bool:
+    """Streamed .ics ingestion into the event store: full parse, then the no-change rescan"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calendar = Path(tmp) / 'calendar.ics'
+        first = int(datetime(2026, 1, 5).timestamp())
+        with profiling.stage('bench.generate'):
+            counts, generate_seconds = timed(write_synthetic_calendar, calendar, n, first, 365 * 86400)
+
+        store = EventStore(Path(tmp) / 'events.db')
+        try:
+            ingestor = CalendarIngestor(store)
+            with profiling.stage('calendar.ingest'):
+                stats, ingest_seconds = timed(ingestor.ingest, calendar)
+            if stats['events'] != counts['events']:
+                log(f"❌ ingested {stats['events']:,} of {counts['events']:,} events", 'red')
+                return False
+            with profiling.stage('calendar.rescan'):
+                rescan, rescan_seconds = timed(ingestor.ingest, calendar)
+            if rescan['unchanged'] != 1 or rescan['events']:
+                log(f"❌ unchanged calendar was re-parsed: {rescan}", 'red')
+                return False
+        finally:
+            store.close()
+        size = calendar.stat().st_size
+
+    log(f"ingest n={n:,} events ({size / 1e6:,.1f} MB, {counts['recurring']:,} recurring)", 'bold')
+    log(f"   generate: {generate_seconds * 1000:8.1f} ms", 'cyan')
+    log(f"   ingest:   {ingest_seconds * 1000:8.1f} ms  ({n / ingest_seconds:,.0f} events/s, "
+        f"{size / 1e6 / ingest_seconds:,.1f} MB/s)", 'green')
+    log(f"   rescan:   {rescan_seconds * 1000:8.1f} ms  (unchanged file)", 'green')
+    return True
+
+
+def bench_transcripts(n: int) -> bool:
+    """JSONL backfill (serial and parallel) and the incremental tail, checked against the generated totals"""
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        projects_dir = Path(tmp) / 'projects'
+        with profiling.stage('bench.generate'):
+            expected = write_synthetic_transcripts(projects_dir, n, now)
+
+        # The parallel pass only differs on a multi-core machine
+        results = {}
+        for workers in (1, os.cpu_count() or 1) if (os.cpu_count() or 1) > 1 else (1,):
+            aggregator = UsageAggregator(Path(tmp) / f'usage-{workers}.db', projects_dir)
+            try:
+                with profiling.stage('usage.backfill'):
+                    stats = aggregator.backfill(workers, now=now)
+                totals = aggregator.totals_since(0)
+            finally:
+                aggregator.close()
+            if stats['records'] != expected['records'] or totals != expected['tokens']:
+                log(f"❌ backfill (workers={workers}) read {stats['records']:,} records {totals}, "
+                    f"expected {expected['records']:,} {expected['tokens']}", 'red')
+                return False
+            results[workers] = stats
+
+        # Tail: append 10% more lines and refresh from the checkpoints
+        appended = max(n // 10, 1)
+        write_synthetic_transcripts(projects_dir, appended, now, seed=6, expected=expected)
+        aggregator = UsageAggregator(Path(tmp) / 'usage-1.db', projects_dir)
+        try:
+            with profiling.stage('usage.refresh'):
+                refresh, refresh_seconds = timed(aggregator.refresh, now)
+            totals = aggregator.totals_since(0)
+        finally:
+            aggregator.close()
+        if totals != expected['tokens']:
+            log(f"❌ incremental refresh totals {totals} != expected {expected['tokens']}", 'red')
+            return False
+
+    serial = results[1]
+    log(f"jsonl  n={n:,} lines ({serial['bytes'] / 1e6:,.1f} MB, {serial['files']} files, "
+        f"{expected['records']:,} usage records)", 'bold')
+    log(f"   backfill x1:  {serial['seconds'] * 1000:8.1f} ms  ({serial['lines_per_s']:,.0f} lines/s, "
+        f"{serial['mb_per_s']:,.1f} MB/s)", 'green')
+    for workers, parallel in results.items():
+        if workers != 1:
+            log(f"   backfill x{parallel['workers']}:  {parallel['seconds'] * 1000:8.1f} ms  "
+                f"({parallel['lines_per_s']:,.0f} lines/s, {parallel['mb_per_s']:,.1f} MB/s)", 'green')
+    log(f"   tail +{appended:,}: {refresh_seconds * 1000:8.1f} ms  ({refresh['bytes'] / 1e6:,.1f} MB read)", 'green')
+    return True
+
+
+def bench_tracker(n: int) -> bool:
+    """Loading the budget: token-tracker.json through the bridge vs. the status snapshot"""
+    status = {
+        'lastUpdated': '2026-01-05T12:00:00.000Z',
+        'weekly': {'total': 1234567, 'byModel': {m: 411522 for m in _MODELS}, 'limits': {}},
+        'daily': {'total': 45678, 'byModel': {_MODELS[0]: 45678}},
+        'fiveHourWindow': {'limit': 200000, 'used': 45678, 'remaining': 154322},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        bridge = cli.iCalTokenBridge()
+        bridge.claude_dir = Path(tmp)
+        bridge.tracker_path = Path(tmp) / 'token-tracker.json'
+        bridge.projects_dir = Path(tmp) / 'projects'
+        bridge.socket_path = Path(tmp) / 'daemon.sock'
+        bridge.tracker_path.write_text(json.dumps(status, indent=2))
+        path = snapshot_path(tmp)
+        publish_status(path, status, time.time())
+
+        if bridge.get_current_budget_status() != status or json.loads(read_snapshot(path, time.time())) != status:
+            log("❌ tracker and snapshot disagree", 'red')
+            return False
+
+        with profiling.stage('tracker.load'):
+            _, tracker_seconds = timed(lambda: [bridge.get_current_budget_status() for _ in range(n)])
+        with profiling.stage('snapshot.read'):
+            _, snapshot_seconds = timed(lambda: [read_snapshot(path, time.time()) for _ in range(n)])
+
+    log(f"budget n={n:,} loads", 'bold')
+    log(f"   tracker json: {tracker_seconds / n * 1e6:8.1f} us/load", 'cyan')
+    log(f"   snapshot:     {snapshot_seconds / n * 1e6:8.1f} us/load  ({tracker_seconds / snapshot_seconds:.1f}x)", 'green')
+    return True
+
+
+def bench_pipeline(n: int) -> bool:
+    """'week' end to end on one synthetic week: ingest, query + tags, batch prediction, rollups"""
+    week_start = datetime(2026, 6, 8)
+    with tempfile.TemporaryDirectory() as tmp:
+        calendar = Path(tmp) / 'calendar.ics'
+        # Keep events clear of the week's edges so every zone's wall clock lands inside it
+        counts = write_synthetic_calendar(calendar, n, int((week_start + timedelta(hours=14)).timestamp()),
+                                          6 * 86400 - 14 * 3600, seed=4)
+
+        bridge = cli.iCalTokenBridge()
+        bridge.calendar_path = calendar
+        bridge._event_store = EventStore(Path(tmp) / 'events.db')
+        bridge._rate_model_loaded = True
+        try:
+            _, ingest_seconds = timed(bridge.refresh_calendar, True)
+            sessions, load_seconds = timed(bridge.load_sessions, week_start, week_start + timedelta(days=7))
+            columns, predict_seconds = timed(bridge.attach_predictions, sessions)
+            with profiling.stage('rollups'):
+                impact, rollup_seconds = timed(budget_rollups, [s['start_ts'] for s in sessions], columns,
+                                               int(week_start.timestamp()))
+        finally:
+            bridge.event_store.close()
+
+    if len(sessions) != counts['tagged']:
+        log(f"❌ week view found {len(sessions):,} sessions, calendar has {counts['tagged']:,} tagged", 'red')
+        return False
+    by_day = sum(day['base'] for day in impact['days'].values())
+    by_window = sum(window['base'] for window in impact['windows'].values())
+    if not by_day == by_window == sum(s['prediction']['base'] for s in sessions):
+        log(f"❌ rollups disagree: days={by_day:,} windows={by_window:,}", 'red')
+        return False
+
+    total = ingest_seconds + load_seconds + predict_seconds + rollup_seconds
+    log(f"week   n={n:,} events ({len(sessions):,} sessions)", 'bold')
+    log(f"   ingest:  {ingest_seconds * 1000:8.1f} ms", 'cyan')
+    log(f"   load:    {load_seconds * 1000:8.1f} ms  (query + tags)", 'cyan')
+    log(f"   predict: {predict_seconds * 1000:8.1f} ms", 'cyan')
+    log(f"   rollups: {rollup_seconds * 1000:8.1f} ms", 'cyan')
+    log(f"   total:   {total * 1000:8.1f} ms", 'green')
+    return True
+
+
+def _incremental_vs_full(store: EventStore, aggregator: UsageAggregator, token_rates: Dict[str, int],
+                         tmp: str, fit_times: List[float]) -> Optional[str]:
+    """Fit at every time in turn and once from scratch at the last; describe the first difference, if any"""
+    incremental = Calibrator(store, aggregator, token_rates, Path(tmp) / 'incremental.json')
+    for fit_time in fit_times:
+        incremental.fit(now=fit_time)
+    full = Calibrator(store, aggregator, token_rates, Path(tmp) / 'full.json')
+    full.fit(now=fit_times[-1], full=True)
+
+    got = json.loads(incremental.artifact_path.read_text())
+    want = json.loads(full.artifact_path.read_text())
+    if got['sessions'] != want['sessions'] or got['watermark'] != want['watermark']:
+        return (f"{got['sessions']} sessions up to {got['watermark']}, "
+                f"full fit has {want['sessions']} up to {want['watermark']}")
+    for key in sorted(set(got['stats']) | set(want['stats'])):
+        cells = got['stats'].get(key), want['stats'].get(key)
+        if None in cells or not all(math.isclose(a, b, rel_tol=1e-9) for a, b in zip(*cells)):
+            return f"stats[{key!r}] = {cells[0]}, full fit has {cells[1]}"
+    if got['rates'] != want['rates']:
+        return f"rates {got['rates']}, full fit has {want['rates']}"
+    return None
+
+
+def bench_calibration(n: int) -> bool:
+    """Incremental calibrate fits every few hours vs. one full refit over n synthetic calendar events"""
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        projects_dir = Path(tmp) / 'projects'
+        write_synthetic_transcripts(projects_dir, 20 * n, now)
+        aggregator = UsageAggregator(Path(tmp) / 'usage.db', projects_dir)
+        bridge = cli.iCalTokenBridge()
+        try:
+            aggregator.backfill(1, now=now)
+            first = aggregator.first_hour()
+
+            # A still runs at the first fit while B, inside it, has finished:
+            # B must wait for A rather than be counted on its own
+            repro = EventStore(Path(tmp) / 'repro.db')
+            base = first + 3 * 86400 + 10 * HOUR
+            repro.add_events('repro', [
+                dict(_REPRO_EVENT, uid='a', start=base, end=base + 3 * HOUR, title='A #complexity:high'),
+                dict(_REPRO_EVENT, uid='b', start=base + HOUR // 2, end=base + HOUR, title='B #complexity:low'),
+            ])
+            running = base + 2 * HOUR + SETTLE_SECONDS
+            try:
+                problem = _incremental_vs_full(repro, aggregator, bridge.token_rates, tmp, [running, now])
+            finally:
+                repro.close()
+            if problem:
+                log(f"❌ session inside a running one: incremental fit has {problem}", 'red')
+                return False
+
+            calendar = Path(tmp) / 'calendar.ics'
+            write_synthetic_calendar(calendar, n, first, int(now) - first, seed=8)
+            bridge.calendar_path = calendar
+            bridge._event_store = EventStore(Path(tmp) / 'events.db')
+            try:
+                bridge.refresh_calendar(True)
+                fit_times = list(range(first + SETTLE_SECONDS, int(now), 5 * HOUR)) + [now]
+                for artifact in Path(tmp).glob('*.json'):
+                    artifact.unlink()
+                with profiling.stage('calibrate.fit'):
+                    problem, seconds = timed(_incremental_vs_full, bridge.event_store, aggregator,
+                                             bridge.token_rates, tmp, fit_times)
+                sessions = json.loads((Path(tmp) / 'full.json').read_text())['sessions']
+            finally:
+                bridge.event_store.close()
+        finally:
+            aggregator.close()
+    if problem:
+        log(f"❌ incremental fits disagree with a full refit: {problem}", 'red')
+        return False
+
+    log(f"calibrate n={n:,} events ({sessions:,} sessions fitted)", 'bold')
+    log(f"   {len(fit_times)} incremental fits + 1 full: {seconds * 1000:8.1f} ms", 'green')
+    return True
+
+
+def bench_team(n: int) -> bool:
+    """'plan --team' on n sessions in one week: batch prediction + scheduling, with the schedule checked"""
+    rng = random.Random(13)
+    bridge = cli.iCalTokenBridge()
+    bridge._rate_model, bridge._rate_model_loaded = None, True
+    origin = int(datetime(2026, 6, 8).timestamp())
+    horizon = origin + 7 * 86400
+    # About 40 sessions (70 hours) per person per week
+    people = [f'person{i}' for i in range(max(n // 40, 1))]
+
+    sessions, busy = [], {person: [] for person in people}
+    for index in range(n):
+        person = rng.choice(people)
+        start = origin + rng.randrange(0, 7 * 96 - 16) * 900
+        duration = rng.choice([1800, 3600, 5400, 7200, 10800])
+        metadata = {'complexity': rng.choice(list(bridge.token_rates))}
+        if rng.random() < 0.2:
+            metadata['model'] = 'opus'
+        sessions.append({'person': person, 'title': f'Session {index}', 'start_ts': start, 'end_ts': start + duration,
+                         'duration_hours': duration / 3600, 'metadata': metadata, 'series': None})
+        if rng.random() < 0.5:
+            meeting = origin + rng.randrange(0, 7 * 48) * 1800
+            busy[person].append((meeting, meeting + 1800))
+
+    def schedule(limit):
+        columns = bridge.predict_sessions(sessions)
+        rows = [{'person': session['person'], 'title': session['title'], 'start': session['start_ts'],
+                 'end': session['end_ts'], 'tokens': int(columns['base'][index]),
+                 'model': session['metadata'].get('model', 'sonnet')} for index, session in enumerate(sessions)]
+        return rows, plan_team(rows, busy, limit, origin, horizon)
+
+    # A limit around the average window load leaves roughly half the windows overloaded
+    rows, _ = schedule(float('inf'))
+    limit = sum(row['tokens'] * quota_weight(row['model']) for row in rows) / (7 * 24 / 5)
+    with profiling.stage('plan'):
+        (rows, plan), seconds = timed(schedule, limit)
+
+    # Replay the suggestions and check them against the plan's own accounting
+    starts = {index: row['start'] for index, row in enumerate(rows)}
+    models = {index: row['model'] for index, row in enumerate(rows)}
+    moved = set()
+    for suggestion in plan['suggestions']:
+        index = suggestion['session']
+        if suggestion['action'] == 'shift':
+            starts[index] = suggestion['to']
+            moved.add(index)
+        else:
+            models[index] = suggestion['to_model']
+    loads: Dict[int, float] = {}
+    for index, row in enumerate(rows):
+        window = (starts[index] - origin) // (5 * 3600)
+        loads[window] = loads.get(window, 0.0) + row['tokens'] * quota_weight(models[index])
+    for window, load in loads.items():
+        if abs(load - plan['after'].get(window, 0.0)) > 1e-6 * max(load, 1):
+            log(f"❌ window {window} replays to {load:,.0f}, plan says {plan['after'].get(window, 0):,.0f}", 'red')
+            return False
+        if load > limit and window not in plan['unresolved']:
+            log(f"❌ window {window} is over the limit but not reported", 'red')
+            return False
+        if load > limit and window not in plan['overloaded']:
+            log(f"❌ a suggestion pushed window {window} over the limit", 'red')
+            return False
+
+    # A moved session may not overlap anything else its owner has on the calendar
+    for index in moved:
+        row = rows[index]
+        start, end = starts[index], starts[index] + row['end'] - row['start']
+        others = [(other['start'], other['end']) for other_index, other in enumerate(rows)
+                  if other['person'] == row['person'] and other_index != index]
+        others += [(starts[i], starts[i] + rows[i]['end'] - rows[i]['start']) for i in moved
+                   if i != index and rows[i]['person'] == row['person']]
+        others += busy[row['person']]
+        if any(a < end and start < b for a, b in others):
+            log(f"❌ session {index} was moved onto {row['person']}'s busy time", 'red')
+            return False
+
+    shifts = sum(1 for suggestion in plan['suggestions'] if suggestion['action'] == 'shift')
+    budget = TEAM_BUDGET_MS * max(n, 10000) / 10000
+    ok = seconds * 1000 <= budget
+    log(f"team   n={n:,} sessions, {len(people)} people, {len(plan['overloaded'])} overloaded windows "
+        f"(budget {budget:g} ms)", 'bold')
+    log(f"   {shifts:,} shifts, {len(plan['suggestions']) - shifts:,} downgrades, "
+        f"{len(plan['unresolved'])} windows left over, {len(plan['conflicts']):,} double bookings", 'cyan')
+    log(f"   predict + plan: {seconds * 1000:8.1f} ms", 'green' if ok else 'red')
+    if not ok:
+        log(f"❌ planning {n:,} sessions exceeds {budget:g} ms", 'red')
+    return ok
+
+
+def bench_startup(n: int) -> bool:
+    """Fresh-process 'status' answered from the snapshot, against STARTUP_BUDGET_MS"""
+    command = [sys.executable, str(SCRIPTS_DIR / 'ical-intelligence.py'), 'status']
+    with tempfile.TemporaryDirectory() as home:
+        status = {
+            'lastUpdated': '2026-01-05T12:00:00.000Z',
+            'weekly': {'total': 1234567, 'byModel': {'claude-sonnet-4': 1234567}, 'limits': {}},
+            'daily': {'total': 45678, 'byModel': {'claude-sonnet-4': 45678}},
+            'fiveHourWindow': {'limit': 200000, 'used': 45678, 'remaining': 154322},
+        }
+        publish_status(snapshot_path(home), status, time.time())
+        env = dict(os.environ, HOME=home)
+        env.pop('ICAL_STATUS_MAX_AGE', None)
+
+        # First run writes the package bytecode, as any earlier invocation would have
+        expected = json.dumps(status, indent=2) + '\n'
+        output = subprocess.run(command, env=env, capture_output=True, text=True).stdout
+        if output != expected:
+            log(f"❌ status output does not match the snapshot:\n{output}", 'red')
+            return False
+
+        def runs(args) -> list:
+            samples = []
+            for _ in range(n):
+                started = time.perf_counter()
+                subprocess.run(args, env=env, stdout=subprocess.DEVNULL, check=True)
+                samples.append((time.perf_counter() - started) * 1000)
+            return samples
+
+        baseline = runs([sys.executable, '-c', 'pass'])
+        samples = runs(command)
+
+    median = statistics.median(samples)
+    ok = median <= STARTUP_BUDGET_MS
+    log(f"startup  n={n} runs of 'status' (budget {STARTUP_BUDGET_MS:g} ms)", 'bold')
+    log(f"   python -c pass: {statistics.median(baseline):6.1f} ms median", 'cyan')
+    log(f"   status:         {median:6.1f} ms median, {min(samples):.1f} ms best", 'green' if ok else 'red')
+    if not ok:
+        log(f"❌ 'status' cold start exceeds {STARTUP_BUDGET_MS:g} ms", 'red')
+    return ok
+
+
+CASES = {
+    'batch': (bench_batch, 100000),
+    'tags': (bench_tags, 100000),
+    'recurrence': (bench_recurrence, 2000),
+    'ingest': (bench_ingest, 10000),
+    'transcripts': (bench_transcripts, 100000),
+    'tracker': (bench_tracker, 10000),
+    'pipeline': (bench_pipeline, 10000),
+    'calibration': (bench_calibration, 300),
+    'team': (bench_team, 10000),
+    'startup': (bench_startup, 30),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('cases', nargs='*', help=f"cases to run: {', '.join(CASES)} (default: all)")
+    parser.add_argument('--n', type=int, help='override the per-case size')
+    parser.add_argument('--profile', action='store_true',
+                        help='print per-stage timings and peak memory as JSON on stderr (also ICAL_PROFILE=1)')
+    args = parser.parse_args()
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    if args.profile or os.environ.get('ICAL_PROFILE', '') not in ('', '0'):
+        profiling.enable('bench ' + ' '.join(args.cases or CASES))
+
+    ok = True
+    for name in args.cases or CASES:
+        func, default_n = CASES[name]
+        ok = func(args.n or default_n) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""
+Support modules for scripts/ical-intelligence.py
+
+Kept as a package next to the script so each CLI command only pays for
+the subsystems it actually uses.
+"""
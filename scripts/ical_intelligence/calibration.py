@@ -0,0 +1,290 @@
+"""
+Learned token rates (ical-intelligence.py calibrate)
+
+Joins past calendar sessions with the usage actually recorded in the
+transcripts over the same time range, and fits:
+
+- a token rate per complexity, shrunk toward the built-in rule rates
+- a token rate per (#project, complexity), shrunk toward the complexity rate
+- a multiplier per time-of-day bucket (early morning vs. late evening)
+- a confidence per cell from the sample count and the spread of
+  actual / predicted
+
+Every statistic is an additive sum, so a refit only folds in sessions
+that finished since the last watermark. The fitted tables are written to
+a small JSON artifact that predict_session_tokens loads lazily.
+"""
+
+import json
+import math
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .batch import RULE_CONFIDENCE
+from .store import EventStore
+from .tags import SESSION_TAG_RE, parse_tags
+from .usage import HOUR, UsageAggregator
+
+ARTIFACT_VERSION = 1
+
+# Pseudo-observations pulling sparse cells toward their parent rate
+PRIOR_HOURS = 4.0
+PRIOR_SESSIONS = 5.0
+
+# Leave recently finished sessions alone until their transcripts are flushed
+SETTLE_SECONDS = HOUR
+
+# (name, first local hour) of each time-of-day bucket
+TIME_BUCKETS = (('night', 0), ('early', 6), ('day', 10), ('evening', 18))
+
+_PROJECT_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+
+def time_bucket(hour: int) -> str:
+    """Time-of-day bucket of a local hour"""
+    name = TIME_BUCKETS[0][0]
+    for bucket, first_hour in TIME_BUCKETS:
+        if hour >= first_hour:
+            name = bucket
+    return name
+
+
+def project_matches(tag: str, directory: str) -> bool:
+    """Does a #project: tag name a transcript directory? Claude Code dashes every separator"""
+    tag = _PROJECT_SEPARATORS.sub('-', tag).strip('-')
+    directory = directory.lower()
+    return bool(tag) and (directory == tag or directory.endswith('-' + tag))
+
+
+def _add(stats: Dict[str, List[float]], key: str, tokens: float, hours: float, baseline: float):
+    """Accumulate [n, tokens, hours, baseline, sum log ratio, sum log ratio^2]"""
+    cell = stats.setdefault(key, [0, 0.0, 0.0, 0.0, 0.0, 0.0])
+    ratio = math.log(tokens / baseline)
+    cell[0] += 1
+    cell[1] += tokens
+    cell[2] += hours
+    cell[3] += baseline
+    cell[4] += ratio
+    cell[5] += ratio * ratio
+
+
+def _confidence(cell: List[float]) -> float:
+    count, _, _, _, total, squares = cell
+    spread = math.sqrt(max(squares / count - (total / count) ** 2, 0.0))
+    observed = min(max(1.0 / (1.0 + spread), 0.3), 0.95)
+    weight = count / (count + PRIOR_SESSIONS)
+    return round(weight * observed + (1 - weight) * RULE_CONFIDENCE, 3)
+
+
+def derive_rates(stats: Dict[str, List[float]], token_rates: Dict[str, int]) -> Dict:
+    """Turn the accumulated sums into the rate tables stored in the artifact"""
+    complexities = {}
+    for complexity, default in token_rates.items():
+        cell = stats.get(f'c:{complexity}')
+        if cell:
+            rate = (cell[1] + PRIOR_HOURS * default) / (cell[2] + PRIOR_HOURS)
+            complexities[complexity] = [round(rate, 1), _confidence(cell)]
+
+    projects = {}
+    for key, cell in stats.items():
+        if key.startswith('p:'):
+            project, complexity = key[2:].rsplit('|', 1)
+            parent = complexities.get(complexity, [token_rates.get(complexity, 0)])[0]
+            rate = (cell[1] + PRIOR_HOURS * parent) / (cell[2] + PRIOR_HOURS)
+            projects[f'{project}|{complexity}'] = [round(rate, 1), _confidence(cell)]
+
+    # Time of day: actual tokens vs. what the fitted complexity rates expect
+    # in the same bucket, so a bucket full of low-complexity work is not
+    # mistaken for a slow time of day
+    buckets: Dict[str, List[float]] = {}
+    for key, cell in stats.items():
+        if key.startswith('t:'):
+            bucket, complexity = key[2:].rsplit('|', 1)
+            rate = complexities.get(complexity, [token_rates.get(complexity, 0)])[0]
+            totals = buckets.setdefault(bucket, [0, 0.0, 0.0])
+            totals[0] += cell[0]
+            totals[1] += cell[1]
+            totals[2] += cell[2] * rate
+    time_of_day = {}
+    for bucket, (count, tokens, expected) in buckets.items():
+        if expected:
+            weight = count / (count + PRIOR_SESSIONS)
+            time_of_day[bucket] = round(weight * tokens / expected + (1 - weight), 3)
+
+    return {'complexity': complexities, 'projects': projects, 'time_of_day': time_of_day}
+
+
+def _overlap_runs(spans: List[Tuple]) -> Iterator[List[Tuple]]:
+    """Group (start, end, ...) tuples sorted by start into runs of transitively overlapping ones"""
+    run, run_end = [], None
+    for span in spans:
+        if run and span[0] < run_end:
+            run.append(span)
+            run_end = max(run_end, span[1])
+        else:
+            if run:
+                yield run
+            run, run_end = [span], span[1]
+    if run:
+        yield run
+
+
+def _empty_state() -> Dict:
+    return {'version': ARTIFACT_VERSION, 'watermark': None, 'sessions': 0, 'stats': {}}
+
+
+class RateModel:
+    """Fitted rates as loaded from the artifact"""
+
+    def __init__(self, data: Dict):
+        rates = data['rates']
+        self.complexities = {key: tuple(value) for key, value in rates['complexity'].items()}
+        self.projects = {key: tuple(value) for key, value in rates['projects'].items()}
+        multipliers = rates['time_of_day']
+        self.hourly = [multipliers.get(time_bucket(hour), 1.0) for hour in range(24)]
+        self.sessions = data.get('sessions', 0)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['RateModel']:
+        """The fitted model, or None when calibrate has not run (or the file is unreadable)"""
+        try:
+            data = json.loads(path.read_text())
+            if data.get('version') != ARTIFACT_VERSION:
+                return None
+            return cls(data)
+        except (OSError, ValueError, KeyError, AttributeError):
+            return None
+
+    def rate(self, complexity: str, project: Optional[str] = None,
+             start: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """(tokens per hour, confidence) for a session, or None if nothing was learned for it"""
+        cell = self.projects.get(f'{project}|{complexity}') if project else None
+        if cell is None:
+            cell = self.complexities.get(complexity)
+            if cell is None:
+                return None
+        rate, confidence = cell
+        if start is not None:
+            rate *= self.hourly[datetime.fromtimestamp(start).hour]
+        return rate, confidence
+
+
+class Calibrator:
+    """Incrementally fits the rate model from the event store and the usage rollups"""
+
+    def __init__(self, store: EventStore, aggregator: UsageAggregator,
+                 token_rates: Dict[str, int], artifact_path: Path):
+        self.store = store
+        self.aggregator = aggregator
+        self.token_rates = token_rates
+        self.artifact_path = artifact_path
+
+    def _load_state(self) -> Dict:
+        try:
+            data = json.loads(self.artifact_path.read_text())
+            if data.get('version') == ARTIFACT_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return _empty_state()
+
+    def fit(self, now: Optional[float] = None, full: bool = False) -> Dict:
+        """
+        Fold sessions that ended since the last watermark into the model
+
+        Returns counts of sessions used and skipped. full=True discards
+        the accumulated sums and refits from the oldest recorded usage.
+        """
+        now = time.time() if now is None else now
+        state = _empty_state() if full else self._load_state()
+        stats = state['stats']
+        result = {'sessions': 0, 'overlapping': 0, 'no_usage': 0, 'pending': 0,
+                  'total_sessions': state['sessions'], 'rates': state.get('rates', {})}
+
+        cutoff = int(now) - SETTLE_SECONDS
+        lower = state['watermark'] if state['watermark'] is not None else self.aggregator.first_hour()
+        if lower is None or lower >= cutoff:
+            return result
+
+        candidates = []
+        for event in self.store.events_between(lower, cutoff):
+            if event['all_day'] or event['start'] < lower or event['end'] <= event['start']:
+                continue
+            if not SESSION_TAG_RE.search(f"{event['title']} {event['description']}"):
+                continue
+            candidates.append((event['start'], event['end'], event))
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        # Usage during overlapping sessions cannot be split between them. A
+        # run that reaches past the cutoff is still running or too recent:
+        # the whole run is revisited on the next fit, so sessions that only
+        # overlap a running one are judged once it has finished, exactly as
+        # a full refit would
+        sessions = []
+        watermark = cutoff
+        for run in _overlap_runs(candidates):
+            if max(end for _, end, _ in run) > cutoff:
+                watermark = min(watermark, run[0][0])
+                result['pending'] += len(run)
+            elif len(run) > 1:
+                result['overlapping'] += len(run)
+            else:
+                start, end, event = run[0]
+                sessions.append((start, end, parse_tags(event['title'], event['description'])))
+
+        by_hour: Dict[int, List[Tuple[int, int]]] = {}
+        for file_id, hour, tokens in self.aggregator.hourly_usage(lower, cutoff):
+            by_hour.setdefault(hour, []).append((file_id, tokens))
+        projects = self.aggregator.file_projects()
+        matching: Dict[str, Optional[set]] = {}
+
+        for start, end, metadata in sessions:
+            project = metadata.get('project')
+            files = None
+            if project:
+                if project not in matching:
+                    # An unrecognized tag falls back to all usage in the range
+                    matched = {file_id for file_id, name in projects.items() if project_matches(project, name)}
+                    matching[project] = matched or None
+                files = matching[project]
+
+            # Hourly rollups are spread evenly over their hour
+            tokens = 0.0
+            hour = start - start % HOUR
+            while hour < end:
+                overlap = min(end, hour + HOUR) - max(start, hour)
+                for file_id, used in by_hour.get(hour, ()):
+                    if files is None or file_id in files:
+                        tokens += used * overlap / HOUR
+                hour += HOUR
+            if tokens < 1:
+                result['no_usage'] += 1
+                continue
+
+            complexity = metadata['complexity']
+            hours = (end - start) / HOUR
+            baseline = hours * self.token_rates[complexity]
+            _add(stats, f'c:{complexity}', tokens, hours, baseline)
+            if project:
+                _add(stats, f'p:{project}|{complexity}', tokens, hours, baseline)
+            _add(stats, f't:{time_bucket(datetime.fromtimestamp(start).hour)}|{complexity}', tokens, hours, baseline)
+            result['sessions'] += 1
+
+        state['watermark'] = watermark
+        state['sessions'] += result['sessions']
+        state['fitted_at'] = int(now)
+        state['rates'] = derive_rates(stats, self.token_rates)
+        self._save(state)
+        result['total_sessions'] = state['sessions']
+        result['rates'] = state['rates']
+        return result
+
+    def _save(self, state: Dict):
+        self.artifact_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.artifact_path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps(state, separators=(',', ':')))
+        os.replace(temp_path, self.artifact_path)
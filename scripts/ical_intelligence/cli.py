@@ -0,0 +1,839 @@
+"""
+Command implementations for scripts/ical-intelligence.py
+
+Kept in the package so the bytecode is cached; the script itself only
+handles the 'status' fast path and dispatches here.
+"""
+
+import os
+import sys
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
+
+from .profiling import enable_from, stage
+
+if TYPE_CHECKING:
+    from .calibration import RateModel
+    from .store import EventStore
+    from .usage import UsageAggregator
+
+# ANSI colors for terminal output
+class Colors:
+    RESET = '\033[0m'
+    BOLD = '\033[1m'
+    CYAN = '\033[36m'
+    GREEN = '\033[32m'
+    YELLOW = '\033[33m'
+    RED = '\033[31m'
+    BLUE = '\033[34m'
+    MAGENTA = '\033[35m'
+
+def log(message: str, color: str = 'RESET'):
+    """Print colored log message"""
+    print(f"{getattr(Colors, color.upper(), Colors.RESET)}{message}{Colors.RESET}")
+
+class iCalTokenBridge:
+    """
+    Minimal bridge between iCal and token tracking
+    Phase 1: Manual event parsing and prediction
+    """
+
+    def __init__(self):
+        self.claude_dir = Path.home() / '.claude'
+        self.tracker_path = self.claude_dir / 'token-tracker.json'
+        self.projects_dir = self.claude_dir / 'projects'
+        self.state_dir = self.claude_dir / 'ical-intelligence'
+        self.socket_path = self.state_dir / 'daemon.sock'
+        self.calendar_path = self.find_calendar_location()
+        self.rate_model_path = self.state_dir / 'rate-model.json'
+        self.snapshot_path = str(self.state_dir / 'status.snapshot')
+        self._event_store: Optional['EventStore'] = None
+        self._rate_model: Optional['RateModel'] = None
+        self._rate_model_loaded = False
+
+        # Complexity-based token rates (from your planning docs)
+        self.token_rates = {
+            'low': 5000,      # Simple tasks, bug fixes
+            'medium': 10000,  # Standard development
+            'high': 15000,    # Complex features
+            'critical': 20000 # Architecture, major features
+        }
+
+    def find_calendar_location(self) -> Optional[Path]:
+        """Locate macOS iCal data (or the ICAL_CALENDAR_PATH override)"""
+        override = os.environ.get('ICAL_CALENDAR_PATH')
+        if override:
+            path = Path(override).expanduser()
+            return path if path.exists() else None
+
+        # macOS stores calendars at: ~/Library/Calendars/<id>.calendar/Events/*.ics
+        default = Path.home() / 'Library' / 'Calendars'
+        return default if default.exists() else None
+
+    @property
+    def event_store(self) -> 'EventStore':
+        """Time-indexed event store, opened on first use"""
+        if self._event_store is None:
+            from .store import EventStore
+            self._event_store = EventStore(self.state_dir / 'events.db')
+        return self._event_store
+
+    @property
+    def rate_model(self) -> Optional['RateModel']:
+        """Rates learned by 'calibrate', loaded on first use (None until calibrated)"""
+        if not self._rate_model_loaded:
+            from .calibration import RateModel
+            self._rate_model = RateModel.load(self.rate_model_path)
+            self._rate_model_loaded = True
+        return self._rate_model
+
+    def refresh_calendar(self, force: bool = False) -> Dict:
+        """Ingest new and changed calendar files into the event store"""
+        if self.calendar_path is None:
+            return {}
+        from .ingest import CalendarIngestor
+        interval = float(os.environ.get('ICAL_SCAN_INTERVAL', 60))
+        with stage('calendar.ingest'):
+            return CalendarIngestor(self.event_store, min_interval=interval).ingest(self.calendar_path, force=force)
+
+    def get_sessions(self, start: datetime, end: datetime) -> List[Dict]:
+        """Tagged coding sessions overlapping [start, end), with predictions"""
+        sessions = self.load_sessions(start, end)
+        self.attach_predictions(sessions)
+        return sessions
+
+    def load_sessions(self, start: datetime, end: datetime) -> List[Dict]:
+        """Tagged coding sessions overlapping [start, end), without predictions"""
+        self.refresh_calendar()
+        with stage('calendar.query'):
+            events = self.event_store.events_between(int(start.timestamp()), int(end.timestamp()))
+        return self.tag_sessions(events)
+
+    def tag_sessions(self, events: List[Dict]) -> List[Dict]:
+        """The tagged, timed events among events, as sessions"""
+        from .tags import SESSION_TAG_RE
+
+        sessions = []
+        series_metadata: Dict[int, Optional[Dict]] = {}
+        with stage('tags'):
+            for event in events:
+                if event['all_day']:
+                    continue
+
+                # Occurrences of a recurring series share one parse
+                series = event['series']
+                if series is not None and series in series_metadata:
+                    metadata = series_metadata[series]
+                else:
+                    metadata = None
+                    if SESSION_TAG_RE.search(f"{event['title']} {event['description']}"):
+                        metadata = self.parse_session_metadata(event['title'], event['description'])
+                    if series is not None:
+                        series_metadata[series] = metadata
+                if metadata is None:
+                    continue
+
+                sessions.append({
+                    'title': event['title'],
+                    'start': datetime.fromtimestamp(event['start']),
+                    'start_ts': event['start'],
+                    'end_ts': event['end'],
+                    'duration_hours': (event['end'] - event['start']) / 3600,
+                    'description': event['description'],
+                    'series': series,
+                    'metadata': metadata
+                })
+        return sessions
+
+    def attach_predictions(self, sessions: List[Dict]) -> Dict:
+        """Predict all sessions in one batch; returns the prediction columns"""
+        with stage('predict'):
+            columns = self.predict_sessions(sessions)
+        for index, session in enumerate(sessions):
+            session['prediction'] = {
+                'base': int(columns['base'][index]),
+                'buffer': int(columns['buffer'][index]),
+                'max': int(columns['max'][index]),
+                'confidence': float(columns['confidence'][index]),
+                'method': 'explicit' if columns['explicit'][index]
+                else 'calibrated' if columns['calibrated'][index] else 'rule-based'
+            }
+        return columns
+
+    def predict_sessions(self, sessions: List[Dict], model: str = 'sonnet') -> Dict:
+        """
+        Batch equivalent of predict_session_tokens + estimate_cost over many sessions
+
+        Occurrences of a recurring series are predicted once and the result
+        is shared by every occurrence. Learned rates depend on the time of
+        day, so with a rate model the occurrences are grouped per series and
+        time-of-day bucket instead.
+        """
+        from .batch import predict_batch, take
+
+        bucket = None
+        if self.rate_model is not None:
+            from .calibration import time_bucket
+            bucket = lambda start: time_bucket(datetime.fromtimestamp(start).hour)
+
+        unique: List[Dict] = []
+        index: List[int] = []
+        positions: Dict[object, int] = {}
+        for session in sessions:
+            series = session.get('series')
+            if series is None:
+                index.append(len(unique))
+                unique.append(session)
+            else:
+                key = series if bucket is None else (series, bucket(session['start_ts']))
+                if key not in positions:
+                    positions[key] = len(unique)
+                    unique.append(session)
+                index.append(positions[key])
+
+        complexities = [session['metadata'].get('complexity', 'medium') for session in unique]
+        rates = confidences = None
+        calibrated = [False] * len(unique)
+        if self.rate_model is not None:
+            rates, confidences = [], []
+            for row, (session, complexity) in enumerate(zip(unique, complexities)):
+                learned = self.rate_model.rate(complexity, session['metadata'].get('project'), session.get('start_ts'))
+                if learned is None:
+                    learned = (self.token_rates[complexity], 0.7)
+                else:
+                    calibrated[row] = True
+                rates.append(learned[0])
+                confidences.append(learned[1])
+
+        columns = predict_batch(
+            [session['duration_hours'] for session in unique],
+            complexities,
+            [session['metadata'].get('explicit_tokens') for session in unique],
+            self.token_rates,
+            model,
+            rates,
+            confidences
+        )
+        columns['calibrated'] = calibrated
+        return columns if len(unique) == len(sessions) else take(columns, index)
+
+    def usage_aggregator(self) -> 'UsageAggregator':
+        """Incremental aggregator over the Claude Code transcripts"""
+        from .usage import UsageAggregator
+        return UsageAggregator(self.state_dir / 'usage.db', self.projects_dir)
+
+    def window_limit(self) -> Optional[int]:
+        """5-hour limit from quota-tracker.json, if any"""
+        from .usage import read_window_limit
+        return read_window_limit(self.claude_dir)
+
+    def update_tracker(self) -> Dict:
+        """Refresh the rollups and rewrite token-tracker.json for other consumers"""
+        aggregator = self.usage_aggregator()
+        try:
+            with stage('usage.refresh'):
+                stats = aggregator.refresh()
+            budget = aggregator.publish_status(self.snapshot_path, self.window_limit())
+        finally:
+            aggregator.close()
+        with stage('tracker.write'):
+            self.tracker_path.write_text(json.dumps(budget, indent=2))
+        return stats
+
+    def calibrate(self, full: bool = False) -> Dict:
+        """Fold finished calendar sessions and their actual usage into the rate model"""
+        from .calibration import Calibrator
+        self.refresh_calendar()
+        aggregator = self.usage_aggregator()
+        try:
+            with stage('usage.refresh'):
+                aggregator.refresh()
+            with stage('calibrate.fit'):
+                stats = Calibrator(self.event_store, aggregator, self.token_rates, self.rate_model_path).fit(full=full)
+        finally:
+            aggregator.close()
+        self._rate_model_loaded = False
+        return stats
+
+    def backfill_usage(self, workers: Optional[int] = None) -> Dict:
+        """Rebuild the usage rollups from every transcript in parallel"""
+        aggregator = self.usage_aggregator()
+        try:
+            with stage('usage.backfill'):
+                stats = aggregator.backfill(workers)
+            budget = aggregator.publish_status(self.snapshot_path, self.window_limit())
+        finally:
+            aggregator.close()
+        with stage('tracker.write'):
+            self.tracker_path.write_text(json.dumps(budget, indent=2))
+        return stats
+
+    def serve(self, interval: float = 2.0):
+        """Run the live budget daemon (blocks until interrupted)"""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        from . import daemon
+        log(f"📡 Serving budget status on {self.socket_path} (polling every {interval:g}s)", 'cyan')
+        daemon.serve(self.usage_aggregator, self.socket_path, self.window_limit(), interval, self.snapshot_path)
+
+    def get_current_budget_status(self) -> Dict:
+        """
+        Real-time token status
+
+        Asks a running 'serve' daemon first, then aggregates the transcripts
+        directly (refreshing the status snapshot), then falls back to the
+        tracker file.
+        """
+        if self.socket_path.exists():
+            from . import daemon
+            with stage('daemon.query'):
+                live = daemon.query(self.socket_path)
+            if live is not None and 'weekly' in live:
+                return live
+
+        if self.projects_dir.exists():
+            aggregator = self.usage_aggregator()
+            try:
+                with stage('usage.refresh'):
+                    aggregator.refresh()
+                try:
+                    return aggregator.publish_status(self.snapshot_path, self.window_limit())
+                except OSError:
+                    # The snapshot only speeds up 'status'; answer without it
+                    return aggregator.budget_status(limit=self.window_limit())
+            finally:
+                aggregator.close()
+
+        if not self.tracker_path.exists():
+            log("⚠️  Token tracker not found. Run: node scripts/update-token-tracker.js", 'yellow')
+            return {
+                'weekly': {'total': 0, 'byModel': {}},
+                'daily': {'total': 0, 'byModel': {}},
+                'fiveHourWindow': {'remaining': 200000, 'limit': 200000}
+            }
+
+        with stage('tracker.load'):
+            return json.loads(self.tracker_path.read_text())
+
+    def parse_session_metadata(self, event_title: str, description: str = '') -> Dict:
+        """
+        Extract intelligence from calendar event text
+
+        Supports tags like:
+        - #complexity:high
+        - #project:organized-ai
+        - #tokens:45k
+        - #agents:claude,droid
+        - #model:opus
+        """
+        from .tags import parse_tags
+        return parse_tags(event_title, description)
+
+    def predict_session_tokens(self, duration_hours: float, metadata: Dict,
+                               start: Optional[float] = None) -> Dict:
+        """
+        Predict token usage for a coding session
+
+        Uses the rates learned by 'calibrate' (per project, complexity and
+        time of day, given the session's start time) when available.
+
+        Returns:
+            base_estimate: Conservative estimate
+            buffer: Safety margin (20%)
+            max: Worst-case scenario
+            confidence: Prediction confidence (0-1)
+        """
+        # Use explicit token estimate if provided
+        if 'explicit_tokens' in metadata:
+            base = metadata['explicit_tokens']
+            return {
+                'base': base,
+                'buffer': int(base * 0.2),
+                'max': int(base * 1.3),
+                'confidence': 1.0,
+                'method': 'explicit'
+            }
+
+        complexity = metadata.get('complexity', 'medium')
+        learned = self.rate_model.rate(complexity, metadata.get('project'), start) if self.rate_model else None
+        if learned is not None:
+            rate, confidence = learned
+            base = int(duration_hours * rate)
+            return {
+                'base': base,
+                'buffer': int(base * 0.2),
+                'max': int(base * 1.5),
+                'confidence': confidence,
+                'method': 'calibrated',
+                'rate_used': f"{rate:,.0f}/hour",
+                'complexity': complexity
+            }
+
+        # Calculate based on duration and complexity
+        rate = self.token_rates[complexity]
+        base = int(duration_hours * rate)
+
+        return {
+            'base': base,
+            'buffer': int(base * 0.2),
+            'max': int(base * 1.5),
+            'confidence': 0.7,  # Lower confidence for rule-based
+            'method': 'rule-based',
+            'rate_used': f"{rate}/hour",
+            'complexity': complexity
+        }
+
+    def estimate_cost(self, tokens: int, model: str = 'sonnet') -> float:
+        """
+        Estimate cost based on token count and model
+        Using pricing from planning docs
+        """
+        from .pricing import average_price
+        return tokens * average_price(model)
+
+    def print_session(self, session: Dict):
+        """Display one session with its prediction"""
+        prediction = session['prediction']
+        start = session['start']
+        if isinstance(start, datetime):
+            start = start.strftime('%I:%M %p').lstrip('0')
+
+        log(f"🔨 {session['title']}", 'bold')
+        log(f"   Time: {start} ({session['duration_hours']:g}h)", 'cyan')
+        log(f"   Complexity: {session['metadata']['complexity']}", 'yellow')
+        log(f"   Estimated: {prediction['base']:,} tokens (±{prediction['buffer']:,})", 'green')
+        log(f"   Max: {prediction['max']:,} tokens", 'red')
+        log(f"   Cost: ${self.estimate_cost(prediction['base'], 'sonnet'):.2f} (Sonnet)", 'magenta')
+        log(f"   Confidence: {prediction['confidence']*100:.0f}%\n", 'cyan')
+
+    def show_today_preview(self):
+        """Display today's coding sessions with predictions"""
+        log("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", 'cyan')
+        log("📅 Today's Coding Sessions - Token Intelligence Preview", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        # Get current budget status
+        budget = self.get_current_budget_status()
+
+        log("📊 Current Budget Status:", 'cyan')
+        log(f"  Weekly Used: {budget['weekly']['total']:,} tokens", 'blue')
+        log(f"  Daily Used: {budget['daily']['total']:,} tokens", 'blue')
+        log(f"  5-Hour Window: {budget['fiveHourWindow']['remaining']:,} / {budget['fiveHourWindow']['limit']:,} remaining", 'green')
+
+        now = datetime.now()
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        if self.calendar_path is None:
+            log("\n💡 Example Session Analysis:", 'yellow')
+            log("   (No calendar found - set ICAL_CALENDAR_PATH to a .ics file or directory)\n", 'yellow')
+
+            # Demo session
+            demo_title = 'Build OAuth Integration #complexity:high #project:organized-ai'
+            demo_description = 'Implement OAuth2 flow with token refresh'
+            metadata = self.parse_session_metadata(demo_title, demo_description)
+            sessions = [{
+                'title': demo_title,
+                'start': '2:00 PM',
+                'duration_hours': 3.0,
+                'description': demo_description,
+                'metadata': metadata,
+                'prediction': self.predict_session_tokens(3.0, metadata)
+            }]
+        else:
+            sessions = self.get_sessions(day_start, day_start + timedelta(days=1))
+            log(f"\n📅 {len(sessions)} coding session(s) scheduled today\n", 'yellow')
+
+        for session in sessions:
+            self.print_session(session)
+
+        if sessions:
+            # Budget impact
+            planned = sum(session['prediction']['base'] for session in sessions)
+            new_total = budget['daily']['total'] + planned
+            log("💰 Budget Impact:", 'cyan')
+            log(f"   After sessions: {new_total:,} tokens", 'blue')
+            log(f"   5-Hour remaining: {budget['fiveHourWindow']['remaining'] - planned:,} tokens", 'green')
+
+            percentage = (new_total / budget['fiveHourWindow']['limit']) * 100
+            if percentage > 90:
+                log(f"   ⚠️  Warning: Would use {percentage:.0f}% of 5-hour budget!", 'red')
+            elif percentage > 75:
+                log(f"   ⚠️  Notice: {percentage:.0f}% of 5-hour budget", 'yellow')
+            else:
+                log(f"   ✅ Safe: {percentage:.0f}% of 5-hour budget", 'green')
+        else:
+            log("   Nothing tagged for today. Add #complexity or #tokens tags to calendar events.", 'cyan')
+
+        log("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", 'cyan')
+        log("💡 Next Steps:", 'yellow')
+        log("   1. Add calendar events with #complexity tags", 'cyan')
+        log("   2. Run this script before coding sessions", 'cyan')
+        log("   3. Review budget impact predictions", 'cyan')
+        log("   4. Track actual usage with: node scripts/update-token-tracker.js", 'cyan')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+    def show_week_preview(self):
+        """Display this week's sessions (Monday-Sunday) grouped by day"""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        week_start = today - timedelta(days=today.weekday())
+        sessions = self.load_sessions(week_start, week_start + timedelta(days=7))
+        columns = self.attach_predictions(sessions)
+        from .batch import budget_rollups
+        with stage('rollups'):
+            impact = budget_rollups([s['start_ts'] for s in sessions], columns, int(week_start.timestamp()))
+
+        log("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", 'cyan')
+        log(f"📆 Week of {week_start:%b %d} - Token Intelligence Preview", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        by_day: Dict[int, List[Dict]] = {}
+        for session in sessions:
+            by_day.setdefault(session['start'].toordinal(), []).append(session)
+
+        week_total = 0
+        for offset in range(7):
+            day = week_start + timedelta(days=offset)
+            day_sessions = by_day.get(day.toordinal(), [])
+            day_total = impact['days'].get(day.toordinal(), {}).get('base', 0)
+            week_total += day_total
+
+            color = 'bold' if day.date() == today.date() else 'cyan'
+            log(f"{day:%a %b %d}: {len(day_sessions)} session(s), ~{day_total:,} tokens", color)
+            for session in day_sessions:
+                log(f"   {session['start']:%H:%M}  {session['title']} "
+                    f"({session['duration_hours']:g}h, {session['metadata']['complexity']}) "
+                    f"~{session['prediction']['base']:,}", 'blue')
+
+        log(f"\n📊 Week total: ~{week_total:,} tokens", 'green')
+        log(f"   Cost: ${self.estimate_cost(week_total, 'sonnet'):.2f} (Sonnet) / "
+            f"${self.estimate_cost(week_total, 'opus'):.2f} (Opus)", 'magenta')
+
+        if impact['windows']:
+            window, busiest = max(impact['windows'].items(), key=lambda item: item[1]['base'])
+            limit = self.get_current_budget_status()['fiveHourWindow']['limit']
+            window_start = week_start + timedelta(hours=5 * window)
+            color = 'red' if busiest['base'] > limit else 'green'
+            log(f"   Busiest 5-hour block: {window_start:%a %H:%M}, ~{busiest['base']:,} of {limit:,} tokens", color)
+        print()
+
+    def show_predictions(self, days: int = 7):
+        """Predict token needs for the upcoming sessions"""
+        now = datetime.now()
+        sessions = [s for s in self.load_sessions(now, now + timedelta(days=days)) if s['start'] >= now]
+
+        log(f"\n🔮 Token Needs - Next {days} Days", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        if not sessions:
+            log("No tagged coding sessions coming up.\n", 'yellow')
+            return
+
+        columns = self.attach_predictions(sessions)
+        base = int(sum(columns['base']))
+        worst = int(sum(columns['max']))
+        log(f"   Sessions: {len(sessions)} ({sum(s['duration_hours'] for s in sessions):g}h)", 'cyan')
+        log(f"   Estimated: {base:,} tokens", 'green')
+        log(f"   Maximum: {worst:,} tokens", 'red')
+        log(f"   Cost (Sonnet): ${self.estimate_cost(base, 'sonnet'):.2f}", 'magenta')
+        log(f"   Cost (Opus): ${self.estimate_cost(base, 'opus'):.2f}\n", 'magenta')
+
+        log("🏋️  Heaviest sessions:", 'cyan')
+        for session in sorted(sessions, key=lambda s: s['prediction']['base'], reverse=True)[:5]:
+            log(f"   {session['start']:%a %H:%M}  {session['title']} ~{session['prediction']['base']:,}", 'blue')
+        print()
+
+    def team_calendars(self, paths: List[str]) -> Dict[str, Path]:
+        """
+        Person name -> calendar for 'plan --team'
+
+        Each path (a .ics file or a directory of them) is one person, named
+        after the file stem or directory. Without paths, each entry of the
+        calendar directory is one person.
+        """
+        if paths:
+            entries = [Path(path).expanduser() for path in paths]
+        elif self.calendar_path is not None and self.calendar_path.is_dir():
+            entries = sorted(entry for entry in self.calendar_path.iterdir()
+                             if entry.is_dir() or entry.suffix == '.ics')
+        else:
+            entries = [self.calendar_path] if self.calendar_path is not None else []
+
+        calendars: Dict[str, Path] = {}
+        for entry in entries:
+            name = entry.stem if entry.is_file() else entry.name
+            if name in calendars:
+                name = str(entry)
+            calendars[name] = entry
+        return calendars
+
+    def load_team(self, calendars: Dict[str, Path], start: datetime,
+                  end: datetime) -> Tuple[List[Dict], Dict[str, List[Tuple[int, int]]]]:
+        """Everyone's sessions starting in [start, end), and each person's timed events"""
+        import hashlib
+        from .ingest import CalendarIngestor
+        from .store import EventStore
+
+        interval = float(os.environ.get('ICAL_SCAN_INTERVAL', 60))
+        lower, upper = int(start.timestamp()), int(end.timestamp())
+        sessions: List[Dict] = []
+        busy: Dict[str, List[Tuple[int, int]]] = {}
+        for person_index, (person, path) in enumerate(calendars.items()):
+            if not path.exists():
+                log(f"⚠️  Calendar not found for {person}: {path}", 'yellow')
+                continue
+            # One cached store per calendar, so each is ingested incrementally
+            digest = hashlib.sha1(str(path.resolve()).encode()).hexdigest()[:16]
+            store = EventStore(self.state_dir / 'team' / f'{digest}.db')
+            try:
+                with stage('calendar.ingest'):
+                    CalendarIngestor(store, min_interval=interval).ingest(path)
+                with stage('calendar.query'):
+                    events = store.events_between(lower, upper)
+            finally:
+                store.close()
+
+            busy[person] = [(event['start'], event['end']) for event in events if not event['all_day']]
+            for session in self.tag_sessions(events):
+                if session['start_ts'] < lower:
+                    continue
+                session['person'] = person
+                # Series ids are per store
+                if session['series'] is not None:
+                    session['series'] = (person_index, session['series'])
+                sessions.append(session)
+        return sessions, busy
+
+    def plan_team(self, paths: List[str], limit: Optional[int] = None, model: str = 'sonnet') -> Dict:
+        """
+        Fit the team's sessions for the 7 days from today under the shared 5-hour limit
+
+        Windows are counted from midnight today. Sessions without a
+        #model: tag are assumed to run on model.
+        """
+        from .planner import plan_team
+
+        now = datetime.now()
+        week_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        week_end = week_start + timedelta(days=7)
+        calendars = self.team_calendars(paths)
+        sessions, busy = self.load_team(calendars, week_start, week_end)
+
+        with stage('predict'):
+            columns = self.predict_sessions(sessions)
+        rows = [{
+            'person': session['person'],
+            'title': session['title'],
+            'start': session['start_ts'],
+            'end': session['end_ts'],
+            'tokens': int(columns['base'][index]),
+            'model': session['metadata'].get('model', model),
+        } for index, session in enumerate(sessions)]
+
+        limit = limit or self.window_limit() or 200000
+        with stage('plan'):
+            plan = plan_team(rows, busy, limit, int(week_start.timestamp()), int(week_end.timestamp()),
+                             int(now.timestamp()))
+        plan['people'] = list(calendars)
+        plan['week_start'] = week_start
+        return plan
+
+    def show_team_plan(self, paths: List[str], limit: Optional[int] = None,
+                       model: str = 'sonnet', as_json: bool = False):
+        """Print the team schedule suggestions (as JSON with as_json)"""
+        plan = self.plan_team(paths, limit, model)
+        week_start = plan['week_start']
+
+        def window_start(window: int) -> datetime:
+            return week_start + timedelta(hours=5 * window)
+
+        if as_json:
+            print(json.dumps({
+                'weekStart': week_start.isoformat(),
+                'people': plan['people'],
+                'sessions': plan['sessions'],
+                'limit': plan['limit'],
+                'windows': [{
+                    'start': window_start(window).isoformat(),
+                    'before': round(load),
+                    'after': round(plan['after'][window]),
+                } for window, load in sorted(plan['before'].items())],
+                'suggestions': [dict(
+                    suggestion,
+                    **{'from': datetime.fromtimestamp(suggestion['from']).isoformat(),
+                       'to': datetime.fromtimestamp(suggestion['to']).isoformat(),
+                       'cost': round(suggestion['cost'], 4),
+                       'window_load': round(suggestion['window_load'])},
+                    **({'saved': round(suggestion['saved'], 4)} if 'saved' in suggestion else {})
+                ) for suggestion in plan['suggestions']],
+                'unresolved': [window_start(window).isoformat() for window in plan['unresolved']],
+                'conflicts': plan['conflicts'],
+            }, indent=2))
+            return
+
+        log("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", 'cyan')
+        log(f"👥 Team Plan - 7 Days from {week_start:%a %b %d}", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        if not plan['people']:
+            log("No calendars given. Usage: plan --team <calendar.ics|dir> [...]", 'yellow')
+            return
+        log(f"   {len(plan['people'])} people, {plan['sessions']} session(s), "
+            f"{plan['limit']:,} tokens per 5-hour window (Sonnet-equivalent)", 'cyan')
+
+        if not plan['overloaded']:
+            log("   ✅ Every 5-hour window fits the shared limit\n", 'green')
+        else:
+            log(f"\n📊 Overloaded windows: {len(plan['overloaded'])}", 'cyan')
+            for window in plan['overloaded']:
+                after = plan['after'][window]
+                color = 'red' if after > plan['limit'] else 'green'
+                log(f"   {window_start(window):%a %H:%M}  ~{plan['before'][window]:,.0f} → ~{after:,.0f}", color)
+
+            suggestions = plan['suggestions']
+            log(f"\n🔀 Suggestions ({len(suggestions)}, cheapest sessions first):", 'cyan')
+            for suggestion in suggestions[:20]:
+                start = datetime.fromtimestamp(suggestion['from'])
+                if suggestion['action'] == 'shift':
+                    log(f"   Move   {suggestion['person']}: {suggestion['title']} "
+                        f"{start:%a %H:%M} → {datetime.fromtimestamp(suggestion['to']):%a %H:%M}", 'blue')
+                else:
+                    log(f"   Switch {suggestion['person']}: {suggestion['title']} ({start:%a %H:%M}) "
+                        f"{suggestion['model']} → {suggestion['to_model']}, saves ${suggestion['saved']:.2f}", 'magenta')
+            if len(suggestions) > 20:
+                log(f"   ... and {len(suggestions) - 20} more (use --json for all)", 'blue')
+
+            if plan['unresolved']:
+                log(f"\n   ⚠️  {len(plan['unresolved'])} window(s) still over the limit after all suggestions", 'red')
+            else:
+                log("\n   ✅ All windows fit after these changes", 'green')
+
+        if plan['conflicts']:
+            log(f"\n⚠️  {len(plan['conflicts'])} double-booked session(s)", 'yellow')
+        print()
+
+    def interactive_session_planner(self):
+        """Interactive prompt for planning a coding session"""
+        log("\n🎯 Interactive Session Planner", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        # Get current budget
+        budget = self.get_current_budget_status()
+        log(f"💰 Current budget: {budget['fiveHourWindow']['remaining']:,} tokens remaining\n", 'green')
+
+        # Get session details
+        title = input("📝 Session title: ")
+        duration = float(input("⏱️  Duration (hours): "))
+        complexity = input("🎚️  Complexity (low/medium/high/critical) [medium]: ").strip().lower() or 'medium'
+
+        # Create metadata
+        metadata = {'complexity': complexity}
+
+        # Predict
+        prediction = self.predict_session_tokens(duration, metadata)
+
+        # Display results
+        log(f"\n📊 Session Prediction:", 'bold')
+        log(f"   Estimated: {prediction['base']:,} tokens", 'green')
+        log(f"   Buffer: ±{prediction['buffer']:,} tokens", 'yellow')
+        log(f"   Maximum: {prediction['max']:,} tokens", 'red')
+        log(f"   Cost (Sonnet): ${self.estimate_cost(prediction['base'], 'sonnet'):.2f}", 'magenta')
+        log(f"   Cost (Opus): ${self.estimate_cost(prediction['base'], 'opus'):.2f}\n", 'magenta')
+
+        # Budget check
+        remaining_after = budget['fiveHourWindow']['remaining'] - prediction['base']
+        percentage = (prediction['base'] / budget['fiveHourWindow']['limit']) * 100
+
+        if remaining_after < 0:
+            log(f"⚠️  WARNING: Session would exceed budget by {abs(remaining_after):,} tokens!", 'red')
+        elif percentage > 75:
+            log(f"⚠️  Notice: Session will use {percentage:.0f}% of 5-hour window", 'yellow')
+        else:
+            log(f"✅ Safe: {remaining_after:,} tokens remaining after session", 'green')
+
+        # Calendar event suggestion
+        log(f"\n📅 Suggested Calendar Event:", 'cyan')
+        log(f"   {title} #complexity:{complexity} #tokens:{prediction['base']//1000}k", 'blue')
+        print()
+
+def main():
+    sys.argv[1:] = enable_from(sys.argv[1:])
+    bridge = iCalTokenBridge()
+
+    if len(sys.argv) < 2:
+        command = 'today'
+    else:
+        command = sys.argv[1]
+
+    if command == 'today':
+        bridge.show_today_preview()
+    elif command == 'week':
+        bridge.show_week_preview()
+    elif command == 'predict':
+        bridge.show_predictions()
+    elif command == 'plan':
+        if '--team' in sys.argv:
+            paths, limit, model = [], None, 'sonnet'
+            args = iter(sys.argv[2:])
+            for arg in args:
+                if arg == '--limit':
+                    limit = int(next(args))
+                elif arg == '--model':
+                    model = next(args)
+                elif not arg.startswith('--'):
+                    paths.append(arg)
+            bridge.show_team_plan(paths, limit, model, as_json='--json' in sys.argv)
+        else:
+            bridge.interactive_session_planner()
+    elif command == 'status':
+        budget = bridge.get_current_budget_status()
+        print(json.dumps(budget, indent=2))
+    elif command == 'serve':
+        interval = float(sys.argv[sys.argv.index('--interval') + 1]) if '--interval' in sys.argv else 2.0
+        try:
+            bridge.serve(interval)
+        except RuntimeError as error:
+            log(f"❌ {error}", 'red')
+            sys.exit(1)
+    elif command == 'calibrate':
+        stats = bridge.calibrate(full='--full' in sys.argv)
+        log(f"Calibrated on {stats['sessions']} new session(s) "
+            f"({stats.get('total_sessions', 0)} total)", 'green')
+        skipped = stats['overlapping'] + stats['no_usage']
+        if skipped or stats['pending']:
+            log(f"   Skipped {stats['overlapping']} overlapping and {stats['no_usage']} without usage; "
+                f"{stats['pending']} waiting on a running session", 'cyan')
+        for complexity, (rate, confidence) in stats.get('rates', {}).get('complexity', {}).items():
+            log(f"   {complexity:<8} {rate:>10,.0f}/hour (default {bridge.token_rates[complexity]:,}, "
+                f"confidence {confidence * 100:.0f}%)", 'blue')
+        for bucket, multiplier in stats.get('rates', {}).get('time_of_day', {}).items():
+            log(f"   {bucket:<8} x{multiplier:.2f}", 'blue')
+        log(f"Saved to: {bridge.rate_model_path}", 'green')
+    elif command == 'backfill':
+        workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
+        stats = bridge.backfill_usage(workers)
+        log(f"Backfilled {stats['tailed']} transcripts with {stats['workers']} worker(s) "
+            f"in {stats['seconds']:.2f}s", 'green')
+        log(f"   {stats['bytes'] / 1e6:,.1f} MB, {stats['lines']:,} lines, {stats['records']:,} usage records", 'cyan')
+        log(f"   Throughput: {stats['mb_per_s']:,.1f} MB/s, {stats['lines_per_s']:,.0f} lines/s", 'cyan')
+    elif command == 'update':
+        stats = bridge.update_tracker()
+        log(f"Tailed {stats['tailed']}/{stats['files']} transcripts: "
+            f"{stats['records']:,} new usage records, {stats['bytes']:,} bytes", 'green')
+        log(f"Saved to: {bridge.tracker_path}", 'green')
+    else:
+        log(f"Unknown command: {command}", 'red')
+        log("\nUsage:", 'cyan')
+        log("  python scripts/ical-intelligence.py today   # Preview today's sessions", 'blue')
+        log("  python scripts/ical-intelligence.py week    # Preview this week", 'blue')
+        log("  python scripts/ical-intelligence.py predict # Predict upcoming token needs", 'blue')
+        log("  python scripts/ical-intelligence.py plan    # Interactive planner", 'blue')
+        log("  python scripts/ical-intelligence.py plan --team CAL... [--limit N] [--model M] [--json]"
+            "  # Fit a team's week under the shared 5-hour limit", 'blue')
+        log("  python scripts/ical-intelligence.py status  # Show current budget", 'blue')
+        log("  python scripts/ical-intelligence.py calibrate [--full]  # Learn token rates from past sessions", 'blue')
+        log("  python scripts/ical-intelligence.py update  # Refresh usage rollups and token-tracker.json", 'blue')
+        log("  python scripts/ical-intelligence.py backfill [--workers N]  # Rebuild rollups from all transcripts", 'blue')
+        log("  python scripts/ical-intelligence.py serve [--interval S]   # Live budget daemon on a Unix socket", 'blue')
+        log("\nAdd --profile (or set ICAL_PROFILE=1) to any command for per-stage timings as JSON on stderr", 'cyan')
+
@@ -0,0 +1,227 @@
+"""
+Live budget daemon (ical-intelligence.py serve)
+
+Polls the transcripts, keeps the trailing five hours of token events in
+memory and answers one-line queries over a local Unix socket:
+
+    $ printf 'status\\n' | nc -U ~/.claude/ical-intelligence/daemon.sock
+
+Weekly and daily totals come from the aggregator's hourly rollups and are
+recomputed after every poll; the 5-hour window is evaluated at query time.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .snapshot import publish_status
+from .usage import FIVE_HOURS, UsageAggregator, five_hour_window, iso_timestamp
+
+# Rebuild the window from the rollup store this often, in case another
+# process (cron 'update') consumed transcript lines we never saw
+RESYNC_INTERVAL = 60
+
+
+class SlidingWindow:
+    """Token events over a trailing time span with amortized O(1) eviction"""
+
+    def __init__(self, span: int = FIVE_HOURS):
+        self.span = span
+        self.events: Deque[Tuple[int, str, int]] = deque()
+        self.total = 0
+        self.by_model: Dict[str, int] = {}
+
+    def clear(self):
+        self.events.clear()
+        self.total = 0
+        self.by_model = {}
+
+    def add(self, timestamp: int, model: str, tokens: int):
+        """Record an event; late arrivals are slotted in from the right"""
+        events = self.events
+        if not events or timestamp >= events[-1][0]:
+            events.append((timestamp, model, tokens))
+        else:
+            index = len(events)
+            while index and events[index - 1][0] > timestamp:
+                index -= 1
+            events.insert(index, (timestamp, model, tokens))
+        self.total += tokens
+        self.by_model[model] = self.by_model.get(model, 0) + tokens
+
+    def evict(self, now: float):
+        """Drop events that have slid out of the window"""
+        cutoff = now - self.span
+        events = self.events
+        while events and events[0][0] <= cutoff:
+            _, model, tokens = events.popleft()
+            self.total -= tokens
+            remaining = self.by_model[model] - tokens
+            if remaining:
+                self.by_model[model] = remaining
+            else:
+                del self.by_model[model]
+
+    def oldest(self) -> Optional[int]:
+        return self.events[0][0] if self.events else None
+
+
+class BudgetDaemon:
+    """Polls transcripts and serves budget status over a Unix socket"""
+
+    def __init__(self, aggregator_factory, socket_path: Path, limit: Optional[int] = None,
+                 interval: float = 2.0, snapshot_path: Optional[str] = None):
+        # The aggregator's SQLite connection must stay on one thread, so it
+        # is created and used only inside a dedicated single-thread executor
+        self._aggregator_factory = aggregator_factory
+        self._aggregator: Optional[UsageAggregator] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.socket_path = socket_path
+        self.limit = limit
+        self.interval = interval
+        self.snapshot_path = snapshot_path
+        self.window = SlidingWindow()
+        self.base_status: Dict = {}
+        self._last_resync = 0.0
+
+    def _poll(self, resync: bool) -> Tuple[List[Tuple[int, str, int]], Dict, bool]:
+        """Executor side: tail transcripts, return new events and fresh rollup totals"""
+        if self._aggregator is None:
+            self._aggregator = self._aggregator_factory()
+            resync = True
+
+        now = time.time()
+        records: List[Tuple[int, str, int]] = []
+        stats = self._aggregator.refresh(now, on_record=lambda *record: records.append(record))
+        if resync or 'workers' in stats:
+            # Cold start or periodic resync: seed from the minute buckets
+            records = self._aggregator.recent_buckets(now - FIVE_HOURS)
+            resync = True
+        return records, self._aggregator.budget_status(limit=self.limit), resync
+
+    async def poll_forever(self):
+        loop = asyncio.get_running_loop()
+        failed = unpublished = False
+        while True:
+            resync = failed or time.time() - self._last_resync >= RESYNC_INTERVAL
+            try:
+                records, status, resynced = await loop.run_in_executor(self._executor, self._poll, resync)
+            except Exception as error:
+                # e.g. the database locked by a concurrent 'update'/'backfill'. Retry
+                # next interval; the snapshot is not republished meanwhile, so
+                # 'status' stops trusting it once it ages out
+                print(f"{iso_timestamp(time.time())} poll failed, retrying: {error!r}", file=sys.stderr, flush=True)
+                failed = True
+                await asyncio.sleep(self.interval)
+                continue
+            failed = False
+            if resynced:
+                self.window.clear()
+                self._last_resync = time.time()
+            for timestamp, model, tokens in records:
+                self.window.add(timestamp, model, tokens)
+            self.base_status = status
+            if self.snapshot_path:
+                # Keep the 'status' fast path fresh without a socket round trip.
+                # An unwritable snapshot (full disk, permissions) must not stop
+                # the poller: socket clients still get live totals. Logged once
+                # per outage
+                try:
+                    publish_status(self.snapshot_path, self.status(), time.time())
+                    unpublished = False
+                except OSError as error:
+                    if not unpublished:
+                        print(f"{iso_timestamp(time.time())} snapshot not written: {error!r}",
+                              file=sys.stderr, flush=True)
+                    unpublished = True
+            await asyncio.sleep(self.interval)
+
+    def status(self) -> Dict:
+        """Current budget: rollup totals plus the live 5-hour window"""
+        now = time.time()
+        self.window.evict(now)
+        status = dict(self.base_status)
+        status['lastUpdated'] = iso_timestamp(now)
+        status['fiveHourWindow'] = five_hour_window(self.window.total, self.window.oldest(), self.limit)
+        status['fiveHourWindow']['byModel'] = dict(self.window.by_model)
+        return status
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            command = (await reader.readline()).decode().strip() or 'status'
+            if command == 'status':
+                reply = self.status()
+            elif command == 'ping':
+                reply = {'ok': True, 'pid': os.getpid()}
+            else:
+                reply = {'error': f'unknown command: {command}'}
+            writer.write(json.dumps(reply).encode() + b'\n')
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def run(self):
+        if query(self.socket_path, 'ping') is not None:
+            raise RuntimeError(f'daemon already running on {self.socket_path}')
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        # Prime totals before accepting connections
+        records, self.base_status, _ = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._poll, True
+        )
+        for timestamp, model, tokens in records:
+            self.window.add(timestamp, model, tokens)
+        self._last_resync = time.time()
+
+        server = await asyncio.start_unix_server(self.handle_client, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        poller = asyncio.ensure_future(self.poll_forever())
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            poller.cancel()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            self._executor.shutdown(wait=False)
+
+
+def serve(aggregator_factory, socket_path: Path, limit: Optional[int] = None, interval: float = 2.0,
+          snapshot_path: Optional[str] = None):
+    """Run the daemon in the foreground until SIGINT/SIGTERM"""
+    asyncio.run(BudgetDaemon(aggregator_factory, socket_path, limit, interval, snapshot_path).run())
+
+
+def query(socket_path: Path, command: str = 'status', timeout: float = 0.25) -> Optional[Dict]:
+    """Ask a running daemon; None when nothing is listening"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(str(socket_path))
+            client.sendall(command.encode() + b'\n')
+            chunks = []
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError:
+        return None
+    try:
+        return json.loads(b''.join(chunks))
+    except ValueError:
+        return None
@@ -0,0 +1,255 @@
+"""
+Streaming iCalendar (.ics) reader
+
+Reads VEVENT components one at a time from a binary file handle, so a
+multi-year calendar export is never held in memory as a whole.
+"""
+
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Properties we keep from a VEVENT; everything else is skipped
+_EVENT_PROPERTIES = {
+    'UID', 'SUMMARY', 'DESCRIPTION', 'DTSTART', 'DTEND', 'DURATION',
+    'RRULE', 'EXDATE', 'RDATE', 'RECURRENCE-ID', 'STATUS',
+}
+
+_TEXT_ESCAPES = {'n': '\n', 'N': '\n', '\\': '\\', ';': ';', ',': ','}
+
+_tz_cache: Dict[str, Optional[ZoneInfo]] = {}
+
+
+def iter_content_lines(fp: BinaryIO, offset: int = 0) -> Iterator[Tuple[str, int]]:
+    """
+    Yield unfolded content lines with the byte offset just past each one
+
+    RFC 5545 folds long lines by starting continuation lines with a space
+    or tab; continuations are joined before decoding so multi-byte
+    characters split across a fold survive.
+    """
+    fp.seek(offset)
+    position = offset
+    pending: List[bytes] = []
+    pending_end = offset
+
+    for raw in fp:
+        position += len(raw)
+        if raw[:1] in (b' ', b'\t') and pending:
+            pending.append(raw[1:].rstrip(b'\r\n'))
+            pending_end = position
+            continue
+        if pending:
+            yield b''.join(pending).decode('utf-8', 'replace'), pending_end
+        pending = [raw.rstrip(b'\r\n')]
+        pending_end = position
+
+    if pending:
+        yield b''.join(pending).decode('utf-8', 'replace'), pending_end
+
+
+def parse_content_line(line: str) -> Tuple[str, Dict[str, str], str]:
+    """Split 'NAME;PARAM=VALUE:value' into its name, parameters and value"""
+    in_quotes = False
+    split_at = -1
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ':' and not in_quotes:
+            split_at = index
+            break
+    if split_at < 0:
+        return line.upper(), {}, ''
+
+    head, value = line[:split_at], line[split_at + 1:]
+    name, *raw_params = head.split(';')
+    params = {}
+    for raw in raw_params:
+        key, _, param_value = raw.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def unescape_text(value: str) -> str:
+    """Undo TEXT value escaping (\\n, \\, \\; \\\\)"""
+    if '\\' not in value:
+        return value
+    out = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            nxt = next(chars, '')
+            out.append(_TEXT_ESCAPES.get(nxt, nxt))
+        else:
+            out.append(char)
+    return ''.join(out)
+
+
+def resolve_timezone(tzid: Optional[str]) -> Optional[ZoneInfo]:
+    """Map a TZID to a ZoneInfo, or None for floating/unknown zones (local time)"""
+    if not tzid:
+        return None
+    if tzid not in _tz_cache:
+        try:
+            _tz_cache[tzid] = ZoneInfo(tzid)
+        except (ZoneInfoNotFoundError, ValueError):
+            # Outlook-style names ("Pacific Standard Time") fall back to local time
+            _tz_cache[tzid] = None
+    return _tz_cache[tzid]
+
+
+def parse_datetime(value: str, params: Dict[str, str]) -> Tuple[int, Optional[str], bool]:
+    """
+    Parse a DATE or DATE-TIME value
+
+    Returns (epoch seconds, tzid, all_day). Floating times and all-day
+    dates are interpreted in local time.
+    """
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        day = date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+        return int(datetime(day.year, day.month, day.day).timestamp()), None, True
+
+    naive = datetime(
+        int(value[0:4]), int(value[4:6]), int(value[6:8]),
+        int(value[9:11]), int(value[11:13]), int(value[13:15] or 0)
+    )
+    if value.endswith('Z'):
+        return int(naive.replace(tzinfo=timezone.utc).timestamp()), 'UTC', False
+
+    tzid = params.get('TZID')
+    tz = resolve_timezone(tzid)
+    if tz is None:
+        return int(naive.timestamp()), None, False
+    return int(naive.replace(tzinfo=tz).timestamp()), tzid, False
+
+
+def parse_datetime_list(value: str, params: Dict[str, str]) -> List[int]:
+    """Parse a comma-separated EXDATE/RDATE value into epoch seconds"""
+    if params.get('VALUE') == 'PERIOD':
+        return [parse_datetime(item.split('/')[0], params)[0] for item in value.split(',') if item]
+    return [parse_datetime(item, params)[0] for item in value.split(',') if item]
+
+
+def parse_duration(value: str) -> int:
+    """Parse an RFC 5545 DURATION (e.g. PT1H30M, P1D, -PT15M) into seconds"""
+    value = value.strip()
+    sign = -1 if value.startswith('-') else 1
+    value = value.lstrip('+-').lstrip('P')
+    units = {'W': 604800, 'D': 86400, 'H': 3600, 'M': 60, 'S': 1}
+    total = 0
+    number = ''
+    for char in value:
+        if char.isdigit():
+            number += char
+        elif char in units and number:
+            total += int(number) * units[char]
+            number = ''
+    return sign * total
+
+
+def _build_event(props: Dict[str, List[Tuple[Dict[str, str], str]]]) -> Optional[Dict]:
+    """Turn the raw properties of one VEVENT into an event dict"""
+    if 'DTSTART' not in props:
+        return None
+
+    def first(name: str, default: str = '') -> str:
+        return props[name][0][1] if name in props else default
+
+    start_params, start_value = props['DTSTART'][0]
+    try:
+        start, tzid, all_day = parse_datetime(start_value, start_params)
+    except (ValueError, IndexError):
+        return None
+
+    end = None
+    if 'DTEND' in props:
+        try:
+            end = parse_datetime(props['DTEND'][0][1], props['DTEND'][0][0])[0]
+        except (ValueError, IndexError):
+            end = None
+    if end is None and 'DURATION' in props:
+        end = start + parse_duration(first('DURATION'))
+    if end is None:
+        end = start + (86400 if all_day else 0)
+
+    exdate: List[int] = []
+    for params, value in props.get('EXDATE', []):
+        try:
+            exdate.extend(parse_datetime_list(value, params))
+        except (ValueError, IndexError):
+            continue
+    rdate: List[int] = []
+    for params, value in props.get('RDATE', []):
+        try:
+            rdate.extend(parse_datetime_list(value, params))
+        except (ValueError, IndexError):
+            continue
+
+    recurrence_id = None
+    if 'RECURRENCE-ID' in props:
+        try:
+            recurrence_id = parse_datetime(props['RECURRENCE-ID'][0][1], props['RECURRENCE-ID'][0][0])[0]
+        except (ValueError, IndexError):
+            recurrence_id = None
+
+    return {
+        'uid': first('UID'),
+        'title': unescape_text(first('SUMMARY')),
+        'description': unescape_text(first('DESCRIPTION')),
+        'start': start,
+        'end': max(end, start),
+        'tzid': tzid,
+        'all_day': all_day,
+        'rrule': first('RRULE') or None,
+        'exdate': exdate,
+        'rdate': rdate,
+        'recurrence_id': recurrence_id,
+        'cancelled': first('STATUS').upper() == 'CANCELLED',
+    }
+
+
+def iter_vevents(fp: BinaryIO, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """
+    Yield (event, end_offset) for each VEVENT, starting at a byte offset
+
+    end_offset points just past the END:VEVENT line, so callers can
+    resume an append-only file from the last complete event.
+    Nested components (VALARM) are skipped.
+    """
+    props: Optional[Dict[str, List[Tuple[Dict[str, str], str]]]] = None
+    nested = 0
+
+    for line, end_offset in iter_content_lines(fp, offset):
+        upper = line[:12].upper()
+        if upper.startswith('BEGIN:'):
+            if line[6:].strip().upper() == 'VEVENT':
+                props, nested = {}, 0
+            elif props is not None:
+                nested += 1
+            continue
+        if upper.startswith('END:'):
+            if props is None:
+                continue
+            if nested:
+                nested -= 1
+            elif line[4:].strip().upper() == 'VEVENT':
+                event = _build_event(props)
+                props = None
+                if event is not None:
+                    yield event, end_offset
+            continue
+        if props is None or nested:
+            continue
+
+        name, params, value = parse_content_line(line)
+        if name in _EVENT_PROPERTIES:
+            props.setdefault(name, []).append((params, value))
+
+
+def iter_calendar_events(path: Path) -> Iterator[Dict]:
+    """Stream the events of a single .ics file"""
+    with open(path, 'rb') as fp:
+        for event, _ in iter_vevents(fp):
+            yield event
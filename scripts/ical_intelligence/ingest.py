@@ -0,0 +1,143 @@
+"""
+Incremental calendar ingestion
+
+Each .ics file is checkpointed by mtime, size, content hash and the byte
+offset just past its last complete VEVENT. Unchanged files are skipped
+on a stat() alone, files that only grew are parsed from the checkpoint
+offset, and anything else is re-parsed from scratch.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .ics import iter_vevents
+from .store import EventStore
+
+_HASH_CHUNK = 1 << 20
+
+
+def iter_calendar_files(root: Path) -> Iterator[str]:
+    """Yield every .ics file under root (or root itself if it is a file)"""
+    if root.is_file():
+        yield str(root)
+        return
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith('.ics'):
+                yield os.path.join(dirpath, name)
+
+
+def _hash_file(path: str, prefix_size: int) -> Tuple[Optional[str], str]:
+    """
+    Hash a file in one read
+
+    Returns (hash of the first prefix_size bytes, hash of the whole file);
+    the prefix hash is None when the file is shorter than prefix_size.
+    """
+    hasher = hashlib.sha256()
+    prefix_digest = None
+    consumed = 0
+    with open(path, 'rb') as fp:
+        while True:
+            want = _HASH_CHUNK
+            if prefix_digest is None and consumed < prefix_size:
+                want = min(want, prefix_size - consumed)
+            chunk = fp.read(want)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            consumed += len(chunk)
+            if prefix_digest is None and consumed == prefix_size:
+                prefix_digest = hasher.hexdigest()
+    if prefix_size == 0:
+        prefix_digest = hashlib.sha256().hexdigest()
+    return prefix_digest, hasher.hexdigest()
+
+
+class CalendarIngestor:
+    """Keeps an EventStore in sync with a directory of .ics files"""
+
+    def __init__(self, store: EventStore, min_interval: float = 0):
+        self.store = store
+        # Seconds between directory scans; 0 scans on every call
+        self.min_interval = min_interval
+
+    def ingest(self, root: Path, force: bool = False) -> Dict:
+        """
+        Bring the store up to date with the .ics files under root
+
+        Returns counts of what happened to each file, or {'skipped': True}
+        when the last scan of the same root is newer than min_interval.
+        """
+        now = time.time()
+        root_key = str(root)
+        if (not force and self.min_interval
+                and self.store.get_meta('scan_root', '') == root_key
+                and now - self.store.get_meta('last_scan', 0) < self.min_interval):
+            return {'skipped': True}
+
+        stats = {'unchanged': 0, 'appended': 0, 'reparsed': 0, 'removed': 0, 'events': 0}
+        seen: List[str] = []
+
+        for path in iter_calendar_files(root):
+            seen.append(path)
+            try:
+                self._ingest_file(path, stats)
+            except OSError:
+                # File vanished or became unreadable mid-scan; retry next time
+                continue
+
+        current = set(seen)
+        for source in self.store.known_sources():
+            if source not in current:
+                self.store.remove_source(source)
+                stats['removed'] += 1
+
+        self.store.set_meta('scan_root', root_key)
+        self.store.set_meta('last_scan', now)
+        return stats
+
+    def _ingest_file(self, path: str, stats: Dict):
+        st = os.stat(path)
+        checkpoint = self.store.get_checkpoint(path)
+
+        if checkpoint and checkpoint['mtime_ns'] == st.st_mtime_ns and checkpoint['size'] == st.st_size:
+            stats['unchanged'] += 1
+            return
+
+        old_size = checkpoint['size'] if checkpoint and st.st_size >= checkpoint['size'] else 0
+        prefix_digest, digest = _hash_file(path, old_size)
+
+        if checkpoint and digest == checkpoint['sha256']:
+            # Touched but not modified
+            self.store.set_checkpoint(path, st.st_mtime_ns, st.st_size, digest, checkpoint['offset'])
+            stats['unchanged'] += 1
+            return
+
+        # Append-only growth resumes after the last complete event
+        appended = bool(checkpoint and old_size and prefix_digest == checkpoint['sha256'])
+        offset = checkpoint['offset'] if appended else 0
+
+        with open(path, 'rb') as fp:
+            position = [offset]
+
+            def events():
+                for event, end_offset in iter_vevents(fp, offset):
+                    position[0] = end_offset
+                    yield event
+
+            # Events and checkpoint land together; an append is dropped if a
+            # concurrent run already moved the checkpoint past it
+            count = self.store.commit_source(
+                path, events(), offset or None,
+                lambda: (st.st_mtime_ns, st.st_size, digest, position[0])
+            )
+
+        if count is None:
+            stats['unchanged'] += 1
+            return
+        stats['appended' if offset else 'reparsed'] += 1
+        stats['events'] += count
@@ -0,0 +1,188 @@
+"""
+Team budget planner (ical-intelligence.py plan --team)
+
+A team shares one 5-hour token quota. Each person's sessions go into the
+fixed 5-hour window (counted from the start of the planned week) in which
+they start, as in budget_rollups. A window's load is counted in Sonnet-equivalent
+tokens: each session weighs its predicted tokens times its model's price
+relative to Sonnet, so an Opus hour uses the quota five times as fast.
+
+For every overloaded window the scheduler takes the cheapest movable
+sessions first (by estimate_cost pricing, from one heap across all
+overloaded windows). Each one is either:
+
+- shifted to the same time of day on the nearest other day whose window
+  has room and where its owner is free, or
+- downgraded (Opus to Sonnet) when no such day exists,
+
+until the window fits. Sessions that already started are never moved.
+
+Each person's busy time is kept as a sorted, merged list of intervals, so
+checking whether a slot is free is two bisects and booking it is one
+insort. Double-booked sessions are found with a sweep line over each
+person's sessions.
+"""
+
+import heapq
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .batch import FIVE_HOURS
+from .pricing import average_price
+
+DAY = 24 * 3600
+
+# Suggested cheaper model for each model that has one
+DOWNGRADES = {'opus': 'sonnet'}
+
+
+def quota_weight(model: str) -> float:
+    """Quota used per token of model, relative to Sonnet"""
+    return average_price(model) / average_price('sonnet')
+
+
+def find_conflicts(intervals: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Pairs of indexes of overlapping intervals (sweep line; each overlap against the longest-running one)"""
+    conflicts = []
+    latest_end, latest_index = None, None
+    for index in sorted(range(len(intervals)), key=lambda i: intervals[i][0]):
+        start, end = intervals[index]
+        if latest_end is not None and start < latest_end:
+            conflicts.append((latest_index, index))
+        if latest_end is None or end > latest_end:
+            latest_end, latest_index = end, index
+    return conflicts
+
+
+class BusyTimes:
+    """One person's busy time as disjoint intervals sorted by start"""
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def is_free(self, start: int, end: int) -> bool:
+        """Does [start, end) overlap nothing?"""
+        index = bisect_right(self.starts, start) - 1
+        if index >= 0 and self.ends[index] > start:
+            return False
+        return index + 1 >= len(self.starts) or self.starts[index + 1] >= end
+
+    def book(self, start: int, end: int):
+        """Mark a free [start, end) as busy"""
+        index = bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+
+
+def plan_team(sessions: List[Dict], busy: Dict[str, List[Tuple[int, int]]], limit: float,
+              origin: int, horizon: int, now: Optional[int] = None) -> Dict:
+    """
+    Fit a team's sessions under a shared per-window limit
+
+    sessions: dicts with person, title, start, end (epoch seconds), tokens
+    and model. busy: each person's other timed events. Sessions may be
+    shifted anywhere in [max(origin, now), horizon).
+
+    Returns the suggestions (in the order they were made), the load of
+    every window before and after, the windows still over the limit and
+    the double-booked session pairs.
+    """
+    now = origin if now is None else max(origin, now)
+    count = len(sessions)
+    starts = [session['start'] for session in sessions]
+    ends = [session['end'] for session in sessions]
+    tokens = [session['tokens'] for session in sessions]
+    models = [session['model'] for session in sessions]
+    windows = [(start - origin) // FIVE_HOURS for start in starts]
+    loads_of = [tokens[i] * quota_weight(models[i]) for i in range(count)]
+
+    by_person: Dict[str, List[int]] = {}
+    for index, session in enumerate(sessions):
+        by_person.setdefault(session['person'], []).append(index)
+
+    conflicts = []
+    calendars: Dict[str, BusyTimes] = {}
+    for person, indexes in by_person.items():
+        own = [(starts[i], ends[i]) for i in indexes]
+        conflicts.extend((indexes[a], indexes[b]) for a, b in find_conflicts(own))
+        calendars[person] = BusyTimes(own + list(busy.get(person, ())))
+
+    loads: Dict[int, float] = {}
+    for window, load in zip(windows, loads_of):
+        loads[window] = loads.get(window, 0.0) + load
+    before = dict(loads)
+
+    # Cheapest movable sessions of every overloaded window, cheapest first
+    heap = [(tokens[i] * average_price(models[i]), i) for i in range(count)
+            if loads[windows[i]] > limit and starts[i] >= now]
+    heapq.heapify(heap)
+
+    suggestions = []
+    while heap:
+        cost, index = heapq.heappop(heap)
+        window = windows[index]
+        if loads[window] <= limit:
+            continue
+        start, end, load = starts[index], ends[index], loads_of[index]
+        person = sessions[index]['person']
+
+        target = _free_day(start, end, load, loads, limit, calendars[person], origin, now, horizon)
+        if target is not None:
+            target_window = (target - origin) // FIVE_HOURS
+            loads[window] -= load
+            loads[target_window] = loads.get(target_window, 0.0) + load
+            # The vacated slot stays booked: other sessions are not moved into it
+            calendars[person].book(target, target + end - start)
+            windows[index] = target_window
+            suggestions.append({
+                'action': 'shift', 'session': index, 'person': person, 'title': sessions[index]['title'],
+                'from': start, 'to': target, 'tokens': tokens[index], 'model': models[index],
+                'cost': cost, 'window_load': loads[window]
+            })
+            continue
+
+        model = models[index]
+        cheaper = DOWNGRADES.get(model)
+        if cheaper is not None:
+            lighter = tokens[index] * quota_weight(cheaper)
+            loads[window] -= load - lighter
+            loads_of[index] = lighter
+            models[index] = cheaper
+            suggestions.append({
+                'action': 'downgrade', 'session': index, 'person': person, 'title': sessions[index]['title'],
+                'from': start, 'to': start, 'tokens': tokens[index], 'model': model, 'to_model': cheaper,
+                'cost': cost, 'saved': cost - tokens[index] * average_price(cheaper), 'window_load': loads[window]
+            })
+
+    return {
+        'limit': limit,
+        'sessions': count,
+        'before': before,
+        'after': dict(loads),
+        'overloaded': sorted(window for window, load in before.items() if load > limit),
+        'unresolved': sorted(window for window, load in loads.items() if load > limit),
+        'suggestions': suggestions,
+        'conflicts': conflicts,
+    }
+
+
+def _free_day(start: int, end: int, load: float, loads: Dict[int, float], limit: float,
+              calendar: BusyTimes, origin: int, now: int, horizon: int) -> Optional[int]:
+    """Start of the same slot on the nearest other day (later days first) that fits, or None"""
+    duration = end - start
+    for days in range(1, (horizon - origin) // DAY + 1):
+        for target in (start + days * DAY, start - days * DAY):
+            if target < now or target + duration > horizon:
+                continue
+            if loads.get((target - origin) // FIVE_HOURS, 0.0) + load > limit:
+                continue
+            if calendar.is_free(target, target + duration):
+                return target
+    return None
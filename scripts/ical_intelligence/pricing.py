@@ -0,0 +1,30 @@
+"""
+Model pricing (USD per token, from the planning docs)
+"""
+
+from typing import Dict
+
+PRICING: Dict[str, Dict[str, float]] = {
+    'opus': {
+        'input': 0.000015,
+        'output': 0.000075
+    },
+    'sonnet': {
+        'input': 0.000003,
+        'output': 0.000015
+    },
+    'haiku': {
+        'input': 0.0000005,
+        'output': 0.0000025
+    }
+}
+
+# Assume 50/50 split input/output for estimation
+AVERAGE_PRICE: Dict[str, float] = {
+    model: (prices['input'] + prices['output']) / 2 for model, prices in PRICING.items()
+}
+
+
+def average_price(model: str) -> float:
+    """Blended per-token price; unknown models are priced as Sonnet"""
+    return AVERAGE_PRICE.get(model, AVERAGE_PRICE['sonnet'])
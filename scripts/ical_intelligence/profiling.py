@@ -0,0 +1,113 @@
+"""
+Opt-in stage profiler
+
+Enabled by ICAL_PROFILE=1 or --profile on either script. Hot paths are
+wrapped in named stages:
+
+    with stage('calendar.ingest'):
+        ...
+
+and at exit one JSON object goes to stderr (stdout stays clean for
+'status'): wall time, call count and peak Python heap (tracemalloc) per
+stage, plus the process's peak RSS. When profiling is off, stage()
+returns a shared no-op context, so instrumented code pays one function
+call per stage.
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+_NULL = nullcontext()
+
+_enabled = False
+_started = 0.0
+_command: Optional[str] = None
+_stages: Dict[str, Dict] = {}
+# Peak heap seen so far by the whole run and each open stage, innermost last
+_open_peaks: List[int] = [0]
+
+
+def enable(command: Optional[str] = None):
+    """Start profiling and report when the process exits"""
+    global _enabled, _started, _command
+    if _enabled:
+        return
+    tracemalloc.start()
+    _enabled = True
+    _started = time.perf_counter()
+    _command = command
+    atexit.register(_emit)
+
+
+def enable_from(argv: List[str]) -> List[str]:
+    """Enable if ICAL_PROFILE is set or argv has --profile; returns argv without the flag"""
+    args = [arg for arg in argv if arg != '--profile']
+    if len(args) != len(argv) or os.environ.get('ICAL_PROFILE', '') not in ('', '0'):
+        enable(args[0] if args else None)
+    return args
+
+
+class _Stage:
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        # Fold the parent's peak so far before resetting the counter for this stage
+        _open_peaks[-1] = max(_open_peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        _open_peaks.append(0)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.started
+        peak = max(_open_peaks.pop(), tracemalloc.get_traced_memory()[1])
+        _open_peaks[-1] = max(_open_peaks[-1], peak)
+
+        record = _stages.setdefault(self.name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': 0})
+        record['calls'] += 1
+        record['seconds'] += seconds
+        record['peak_bytes'] = max(record['peak_bytes'], peak)
+        return False
+
+
+def stage(name: str):
+    """Context manager timing one named stage (no-op unless profiling is enabled)"""
+    return _Stage(name) if _enabled else _NULL
+
+
+def report() -> Dict:
+    """Timings so far as a JSON-ready dict"""
+    return {
+        'command': _command,
+        'seconds': round(time.perf_counter() - _started, 6),
+        'peak_heap_bytes': max(_open_peaks[0], tracemalloc.get_traced_memory()[1]),
+        'peak_rss_bytes': _peak_rss(),
+        'stages': {
+            name: {'calls': record['calls'], 'seconds': round(record['seconds'], 6),
+                   'peak_bytes': record['peak_bytes']}
+            for name, record in _stages.items()
+        },
+    }
+
+
+def _peak_rss() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _emit():
+    sys.stderr.write(json.dumps({'profile': report()}) + '\n')
@@ -0,0 +1,305 @@
+"""
+Lazy RRULE/RDATE/EXDATE expansion
+
+Recurring events are stored once, as their series master, and only the
+occurrences inside a queried window are ever generated. Rules without a
+COUNT jump straight to the period containing the window instead of
+walking from DTSTART, and each (rule, window) expansion is memoized, so
+a daily block repeating for years costs the same as a single event.
+
+Occurrences are generated in the wall time of the event's TZID (local
+time for floating events), so a 09:00 block stays at 09:00 across DST
+changes. Supported: FREQ=DAILY/WEEKLY/MONTHLY/YEARLY with INTERVAL,
+COUNT, UNTIL, BYDAY (with ordinals), BYMONTHDAY, BYMONTH, BYHOUR,
+BYMINUTE, BYSECOND, BYSETPOS and WKST. Rules with any other part (such as
+BYWEEKNO or BYYEARDAY), unsupported frequencies and malformed rules fall
+back to DTSTART alone rather than expanding to the wrong times.
+"""
+
+import calendar
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .ics import parse_datetime, resolve_timezone
+
+EXPANSION_CACHE_SIZE = 4096
+
+_WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+_FREQUENCIES = {'DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY'}
+_RULE_PARTS = {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'BYDAY', 'BYMONTHDAY', 'BYMONTH',
+               'BYHOUR', 'BYMINUTE', 'BYSECOND', 'BYSETPOS', 'WKST'}
+
+# Stop a rule that can never match (e.g. BYMONTH=2;BYMONTHDAY=30) after
+# this many consecutive empty periods
+_MAX_EMPTY_PERIODS = 1000
+
+
+def _int_list(value: str) -> Tuple[int, ...]:
+    return tuple(int(item) for item in value.split(',') if item)
+
+
+@lru_cache(maxsize=1024)
+def parse_rrule(rrule: str, tzid: Optional[str] = None) -> Optional[Dict]:
+    """
+    Parse an RRULE value into a rule dict (shared, do not mutate)
+
+    UNTIL is converted to epoch seconds; floating UNTIL values are read
+    in the event's zone. Returns None for rules we cannot expand.
+    """
+    try:
+        parts = dict(part.split('=', 1) for part in rrule.upper().split(';') if part)
+        freq = parts['FREQ']
+        # Ignoring a part we do not implement would expand to the wrong occurrences
+        if freq not in _FREQUENCIES or not _RULE_PARTS.issuperset(parts):
+            return None
+
+        until = None
+        if 'UNTIL' in parts:
+            until, _, date_only = parse_datetime(parts['UNTIL'], {'TZID': tzid} if tzid else {})
+            if date_only:
+                # A DATE until includes the whole day
+                until += 86399
+
+        byday = []
+        for item in parts.get('BYDAY', '').split(','):
+            if item:
+                byday.append((int(item[:-2] or 0), _WEEKDAYS[item[-2:]]))
+
+        byhour = _int_list(parts.get('BYHOUR', ''))
+        byminute = _int_list(parts.get('BYMINUTE', ''))
+        bysecond = _int_list(parts.get('BYSECOND', ''))
+        if (not all(0 <= hour < 24 for hour in byhour) or not all(0 <= minute < 60 for minute in byminute)
+                or not all(0 <= second < 60 for second in bysecond)):
+            return None
+
+        return {
+            'freq': freq,
+            'interval': max(int(parts.get('INTERVAL', 1)), 1),
+            'count': int(parts['COUNT']) if 'COUNT' in parts else None,
+            'until': until,
+            'byday': tuple(byday),
+            'bymonthday': _int_list(parts.get('BYMONTHDAY', '')),
+            'bymonth': _int_list(parts.get('BYMONTH', '')),
+            'byhour': byhour,
+            'byminute': byminute,
+            'bysecond': bysecond,
+            'bysetpos': _int_list(parts.get('BYSETPOS', '')),
+            'wkst': _WEEKDAYS.get(parts.get('WKST', 'MO'), 0),
+        }
+    except (KeyError, ValueError, IndexError):
+        return None
+
+
+def _to_wall(epoch: int, tz) -> datetime:
+    if tz is None:
+        return datetime.fromtimestamp(epoch)
+    return datetime.fromtimestamp(epoch, tz).replace(tzinfo=None)
+
+
+def _to_epoch(wall: datetime, tz) -> int:
+    return int((wall if tz is None else wall.replace(tzinfo=tz)).timestamp())
+
+
+def _week_start(day: date, wkst: int) -> date:
+    return day - timedelta(days=(day.weekday() - wkst) % 7)
+
+
+def _periods_between(rule: Dict, first: date, day: date) -> int:
+    """Number of whole FREQ periods from the one containing first to the one containing day"""
+    freq = rule['freq']
+    if freq == 'DAILY':
+        return (day - first).days
+    if freq == 'WEEKLY':
+        return (_week_start(day, rule['wkst']) - _week_start(first, rule['wkst'])).days // 7
+    if freq == 'MONTHLY':
+        return (day.year - first.year) * 12 + day.month - first.month
+    return day.year - first.year
+
+
+def _month_days(year: int, month: int) -> List[date]:
+    return [date(year, month, day) for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+
+
+def _monthday_matches(day: date, bymonthday: Tuple[int, ...]) -> bool:
+    """BYMONTHDAY test; negative values count back from the end of the month"""
+    return day.day in bymonthday or day.day - calendar.monthrange(day.year, day.month)[1] - 1 in bymonthday
+
+
+def _match_weekdays(days: List[date], byday: Iterable[Tuple[int, int]]) -> set:
+    """Days matching BYDAY; an ordinal picks the nth (or nth-from-last) match in the span"""
+    chosen = set()
+    for ordinal, weekday in byday:
+        matches = [day for day in days if day.weekday() == weekday]
+        if not ordinal:
+            chosen.update(matches)
+        elif 0 < ordinal <= len(matches) or 0 < -ordinal <= len(matches):
+            chosen.add(matches[ordinal - 1 if ordinal > 0 else ordinal])
+    return chosen
+
+
+def _select_days(days: List[date], rule: Dict, default_day: int) -> List[date]:
+    """Apply BYMONTHDAY/BYDAY within a month or year span"""
+    if not rule['bymonthday'] and not rule['byday']:
+        return [day for day in days if day.day == default_day]
+
+    selected = set(days)
+    if rule['bymonthday']:
+        selected = {day for day in selected if _monthday_matches(day, rule['bymonthday'])}
+    if rule['byday']:
+        selected &= _match_weekdays(days, rule['byday'])
+    return sorted(selected)
+
+
+def _period_days(rule: Dict, first: date, offset: int) -> Optional[List[date]]:
+    """Candidate days of the period offset FREQ units after the one containing first"""
+    freq = rule['freq']
+    try:
+        if freq == 'DAILY':
+            day = first + timedelta(days=offset)
+            days = [day]
+            if rule['bymonthday'] and not _monthday_matches(day, rule['bymonthday']):
+                days = []
+            if rule['byday'] and day.weekday() not in {weekday for _, weekday in rule['byday']}:
+                days = []
+        elif freq == 'WEEKLY':
+            week = _week_start(first, rule['wkst']) + timedelta(weeks=offset)
+            weekdays = {weekday for _, weekday in rule['byday']} or {first.weekday()}
+            days = [day for day in (week + timedelta(days=i) for i in range(7)) if day.weekday() in weekdays]
+        elif freq == 'MONTHLY':
+            year, month = divmod(first.month - 1 + offset, 12)
+            days = _select_days(_month_days(first.year + year, month + 1), rule, first.day)
+        else:
+            year = first.year + offset
+            if rule['byday'] and not rule['bymonth'] and not rule['bymonthday']:
+                # Ordinals count across the whole year (e.g. 20MO)
+                span = [date(year, 1, 1) + timedelta(days=i) for i in range(366 if calendar.isleap(year) else 365)]
+                days = sorted(_match_weekdays(span, rule['byday']))
+            else:
+                months = rule['bymonth'] or (range(1, 13) if rule['bymonthday'] else (first.month,))
+                days = []
+                for month in sorted(months):
+                    days.extend(_select_days(_month_days(year, month), rule, first.day))
+    except (ValueError, OverflowError):
+        # Past date.max
+        return None
+
+    if rule['bymonth']:
+        days = [day for day in days if day.month in rule['bymonth']]
+    return days
+
+
+def _times_of_day(rule: Dict, default: time) -> List[time]:
+    """BYHOUR x BYMINUTE x BYSECOND, each defaulting to DTSTART's value"""
+    return sorted(
+        time(hour, minute, second)
+        for hour in rule['byhour'] or (default.hour,)
+        for minute in rule['byminute'] or (default.minute,)
+        for second in rule['bysecond'] or (default.second,)
+    )
+
+
+def iter_rule(start: int, tzid: Optional[str], rule: Dict, lower: Optional[int] = None) -> Iterator[int]:
+    """
+    Yield occurrence start times of a rule in order
+
+    When lower is given and the rule has no COUNT, periods that end
+    before lower are skipped without being generated.
+    """
+    tz = resolve_timezone(tzid)
+    first_wall = _to_wall(start, tz)
+    first = first_wall.date()
+    times = _times_of_day(rule, first_wall.time())
+    until = rule['until']
+
+    period = 0
+    if lower is not None and lower > start and rule['count'] is None:
+        period = _periods_between(rule, first, _to_wall(lower, tz).date()) // rule['interval']
+
+    produced = 0
+    empty = 0
+    while True:
+        days = _period_days(rule, first, period * rule['interval'])
+        if days is None:
+            return
+        walls = [datetime.combine(day, time_of_day) for day in days for time_of_day in times]
+        if rule['bysetpos'] and walls:
+            # BYSETPOS picks from the period's whole expanded set
+            walls = sorted({walls[pos - 1 if pos > 0 else pos] for pos in rule['bysetpos'] if 0 < abs(pos) <= len(walls)})
+        for wall in walls:
+            if wall < first_wall:
+                continue
+            epoch = _to_epoch(wall, tz)
+            if until is not None and epoch > until:
+                return
+            yield epoch
+            produced += 1
+            if rule['count'] is not None and produced >= rule['count']:
+                return
+        empty = 0 if walls else empty + 1
+        if empty > _MAX_EMPTY_PERIODS:
+            return
+        period += 1
+
+
+def _overlaps(start: int, duration: int, window_start: int, window_end: int) -> bool:
+    # Same test as EventStore.events_between (zero-length events count at their start)
+    return start < window_end and (start + duration > window_start or start >= window_start)
+
+
+@lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def expand(start: int, tzid: Optional[str], rrule: str, duration: int,
+           window_start: int, window_end: int) -> Tuple[int, ...]:
+    """Start times of a rule's occurrences overlapping [window_start, window_end)"""
+    rule = parse_rrule(rrule, tzid)
+    if rule is None:
+        return (start,) if _overlaps(start, duration, window_start, window_end) else ()
+
+    starts = []
+    for occurrence in iter_rule(start, tzid, rule, window_start - duration):
+        if occurrence >= window_end:
+            break
+        if _overlaps(occurrence, duration, window_start, window_end):
+            starts.append(occurrence)
+    return tuple(starts)
+
+
+def occurrences_between(event: Dict, window_start: int, window_end: int,
+                        overridden: Iterable[int] = ()) -> List[int]:
+    """
+    Start times of a series master's occurrences overlapping the window
+
+    Combines the RRULE (or DTSTART alone) with RDATE, then drops EXDATE
+    and any instance replaced by a RECURRENCE-ID override.
+    """
+    duration = event['end'] - event['start']
+    if event['rrule']:
+        starts = set(expand(event['start'], event['tzid'], event['rrule'], duration, window_start, window_end))
+    elif _overlaps(event['start'], duration, window_start, window_end):
+        starts = {event['start']}
+    else:
+        starts = set()
+
+    starts.update(rdate for rdate in event['rdate'] if _overlaps(rdate, duration, window_start, window_end))
+    starts.difference_update(event['exdate'])
+    starts.difference_update(overridden)
+    return sorted(starts)
+
+
+def series_end(event: Dict) -> Optional[int]:
+    """End of a series' last occurrence, or None when it repeats forever"""
+    duration = event['end'] - event['start']
+    ends = [event['end']] + [rdate + duration for rdate in event['rdate']]
+    rule = parse_rrule(event['rrule'], event['tzid']) if event['rrule'] else None
+    if rule is not None:
+        if rule['count'] is not None:
+            last = None
+            for last in iter_rule(event['start'], event['tzid'], rule):
+                pass
+            if last is not None:
+                ends.append(last + duration)
+        elif rule['until'] is not None:
+            ends.append(rule['until'] + duration)
+        else:
+            return None
+    return max(ends)
@@ -0,0 +1,75 @@
+"""
+Precomputed budget status snapshot
+
+'status' is polled from shell prompts and editor hooks many times a
+minute, so the aggregator and the daemon publish the rendered status to
+a small fixed-layout file and the CLI answers from it before importing
+anything else. Reading needs only os and struct; keep it that way
+(typing, pathlib and json alone cost more than the whole fast path).
+
+Layout (little-endian):
+
+    magic    4s  b'ICST'
+    version  H
+    reserved H
+    written  d   epoch seconds
+    expires  d   epoch seconds at which the numbers go stale on their own
+                 (local midnight, or the 5-hour window's next reset)
+    length   I   payload size
+    payload      the status JSON exactly as 'status' prints it
+"""
+
+import os
+import struct
+
+MAGIC = b'ICST'
+VERSION = 1
+HEADER = struct.Struct('<4sHHddI')
+
+# Snapshots older than this are recomputed even if nothing has expired
+DEFAULT_MAX_AGE = 60.0
+
+
+def snapshot_path(home: str) -> str:
+    return os.path.join(home, '.claude', 'ical-intelligence', 'status.snapshot')
+
+
+def read_snapshot(path: str, now: float, max_age: float = DEFAULT_MAX_AGE):
+    """Payload bytes of a fresh, intact snapshot, or None"""
+    try:
+        with open(path, 'rb') as fp:
+            data = fp.read()
+    except OSError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, version, _, written, expires, length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or len(data) != HEADER.size + length:
+        return None
+    if now >= expires or not 0 <= now - written <= max_age:
+        return None
+    return data[HEADER.size:]
+
+
+def write_snapshot(path: str, payload: bytes, written: float, expires: float):
+    """Atomically replace the snapshot (readers never see a partial file)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as fp:
+        fp.write(HEADER.pack(MAGIC, VERSION, 0, written, expires, len(payload)) + payload)
+    os.replace(temp_path, path)
+
+
+def publish_status(path: str, status: dict, now: float):
+    """Render a budget status (tracker layout) and write it as the snapshot"""
+    import json
+    from datetime import datetime, timedelta
+
+    # Daily totals roll over at local midnight (weekly ones on a Monday midnight)
+    today = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    expires = (today + timedelta(days=1)).timestamp()
+    reset = status.get('fiveHourWindow', {}).get('resetTime')
+    if reset:
+        expires = min(expires, datetime.fromisoformat(reset.replace('Z', '+00:00')).timestamp())
+
+    write_snapshot(path, (json.dumps(status, indent=2) + '\n').encode(), now, expires)
@@ -0,0 +1,257 @@
+"""
+On-disk event store indexed by time
+
+Parsed calendar events live in SQLite so the today/week/predict views
+only read the rows overlapping the requested window instead of
+re-parsing every .ics file. Recurring events are stored once, as their
+series master, and expanded lazily per query window.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .recurrence import occurrences_between, series_end
+
+# Bump when the schema or stored derived values (series_end) change; the
+# store is a cache and is rebuilt on mismatch
+SCHEMA_VERSION = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    uid TEXT,
+    start INTEGER NOT NULL,
+    "end" INTEGER NOT NULL,
+    title TEXT,
+    description TEXT,
+    tzid TEXT,
+    all_day INTEGER NOT NULL DEFAULT 0,
+    rrule TEXT,
+    exdate TEXT,
+    rdate TEXT,
+    recurrence_id INTEGER,
+    cancelled INTEGER NOT NULL DEFAULT 0,
+    series_end INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_events_start ON events (start, "end");
+CREATE INDEX IF NOT EXISTS idx_events_series ON events (start, series_end)
+    WHERE rrule IS NOT NULL OR rdate IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_events_overrides ON events (uid, recurrence_id)
+    WHERE recurrence_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_events_source ON events (source);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    "offset" INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+
+def _join_epochs(values: List[int]) -> Optional[str]:
+    return ','.join(str(v) for v in values) if values else None
+
+
+def _split_epochs(value: Optional[str]) -> List[int]:
+    return [int(v) for v in value.split(',')] if value else []
+
+
+class EventStore:
+    """SQLite-backed store of calendar events with a (start, end) index"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript(
+                'DROP TABLE IF EXISTS events; DROP TABLE IF EXISTS sources; DROP TABLE IF EXISTS meta;'
+            )
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def get_meta(self, key: str, default=0):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value):
+        with self.conn:
+            self._put_meta(key, value)
+
+    def _put_meta(self, key: str, value):
+        self.conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, value)
+        )
+
+    def add_events(self, source: str, events: Iterable[Dict]) -> int:
+        """
+        Insert events for a source file (streamed, not materialized)
+
+        Tracks the longest event span seen so window queries can bound
+        their index scan on start time alone, and the end of each
+        recurring series (NULL when it repeats forever).
+        """
+        with self.conn:
+            return self._insert_events(source, events)
+
+    def _insert_events(self, source: str, events: Iterable[Dict]) -> int:
+        """add_events inside the caller's transaction"""
+        longest = [self.get_meta('max_span')]
+        count = [0]
+
+        def rows():
+            for event in events:
+                span = event['end'] - event['start']
+                if span > longest[0]:
+                    longest[0] = span
+                count[0] += 1
+                recurring = event['rrule'] or event['rdate']
+                yield (
+                    source, event['uid'], event['start'], event['end'],
+                    event['title'], event['description'], event['tzid'],
+                    int(event['all_day']), event['rrule'],
+                    _join_epochs(event['exdate']), _join_epochs(event['rdate']),
+                    event['recurrence_id'], int(event['cancelled']),
+                    series_end(event) if recurring else None
+                )
+
+        self.conn.executemany(
+            'INSERT INTO events (source, uid, start, "end", title, description, tzid, '
+            'all_day, rrule, exdate, rdate, recurrence_id, cancelled, series_end) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            rows()
+        )
+        self._put_meta('max_span', longest[0])
+        return count[0]
+
+    def remove_source(self, source: str):
+        """Drop every event that came from a source file, and its checkpoint"""
+        with self.conn:
+            self.conn.execute('DELETE FROM events WHERE source = ?', (source,))
+            self.conn.execute('DELETE FROM sources WHERE path = ?', (source,))
+
+    def known_sources(self) -> List[str]:
+        """List every source file with a recorded checkpoint"""
+        return [row[0] for row in self.conn.execute('SELECT path FROM sources')]
+
+    def get_checkpoint(self, source: str) -> Optional[Dict]:
+        """Last ingested mtime, size, content hash and resume offset of a source"""
+        row = self.conn.execute(
+            'SELECT mtime_ns, size, sha256, "offset" FROM sources WHERE path = ?', (source,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def set_checkpoint(self, source: str, mtime_ns: int, size: int, sha256: str, offset: int):
+        with self.conn:
+            self._put_checkpoint(source, mtime_ns, size, sha256, offset)
+
+    def _put_checkpoint(self, source: str, mtime_ns: int, size: int, sha256: str, offset: int):
+        self.conn.execute(
+            'INSERT INTO sources (path, mtime_ns, size, sha256, "offset") VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size, '
+            'sha256 = excluded.sha256, "offset" = excluded."offset"',
+            (source, mtime_ns, size, sha256, offset)
+        )
+
+    def commit_source(self, source: str, events: Iterable[Dict], resume_offset: Optional[int],
+                      checkpoint: Callable[[], Tuple[int, int, str, int]]) -> Optional[int]:
+        """
+        Write a source file's newly parsed events and its checkpoint in one transaction
+
+        With resume_offset the events were parsed from that checkpoint
+        offset and are appended; nothing is written (and None returned) if
+        another process moved the checkpoint since it was read, so
+        concurrent runs never insert the same events twice. Without it the
+        source's events are replaced. checkpoint() gives (mtime_ns, size,
+        sha256, offset) once the events have been consumed.
+        """
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            if resume_offset is None:
+                self.conn.execute('DELETE FROM events WHERE source = ?', (source,))
+            else:
+                current = self.conn.execute('SELECT "offset" FROM sources WHERE path = ?', (source,)).fetchone()
+                if (current[0] if current else None) != resume_offset:
+                    self.conn.rollback()
+                    return None
+            count = self._insert_events(source, events)
+            self._put_checkpoint(source, *checkpoint())
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        return count
+
+    def events_between(self, start: int, end: int) -> List[Dict]:
+        """
+        Return non-cancelled event occurrences overlapping [start, end), ordered by start
+
+        Recurring series only generate the occurrences inside the window.
+        Each occurrence carries the row id of its series master in
+        'series' (None for one-off events and moved/edited instances).
+        """
+        lower = start - self.get_meta('max_span')
+        rows = self.conn.execute(
+            'SELECT * FROM events '
+            'WHERE start >= ? AND start < ? AND ("end" > ? OR start >= ?) AND cancelled = 0 '
+            'AND rrule IS NULL AND rdate IS NULL '
+            'ORDER BY start',
+            (lower, end, start, start)
+        )
+        events = [self._row_to_event(row) for row in rows]
+
+        masters = self.conn.execute(
+            'SELECT * FROM events '
+            'WHERE (rrule IS NOT NULL OR rdate IS NOT NULL) AND start < ? '
+            'AND (series_end IS NULL OR series_end >= ?) '
+            'AND recurrence_id IS NULL AND cancelled = 0',
+            (end, start)
+        ).fetchall()
+        for row in masters:
+            master = self._row_to_event(row)
+            duration = master['end'] - master['start']
+            # Instances replaced (or cancelled) by a RECURRENCE-ID override
+            overridden = [override[0] for override in self.conn.execute(
+                'SELECT recurrence_id FROM events WHERE uid = ? AND recurrence_id >= ? AND recurrence_id < ?',
+                (master['uid'], start - duration, end)
+            )]
+            for occurrence in occurrences_between(master, start, end, overridden):
+                events.append(dict(master, start=occurrence, end=occurrence + duration, series=row['id']))
+
+        if masters:
+            events.sort(key=lambda event: event['start'])
+        return events
+
+    @staticmethod
+    def _row_to_event(row: sqlite3.Row) -> Dict:
+        return {
+            'source': row['source'],
+            'uid': row['uid'],
+            'start': row['start'],
+            'end': row['end'],
+            'title': row['title'] or '',
+            'description': row['description'] or '',
+            'tzid': row['tzid'],
+            'all_day': bool(row['all_day']),
+            'rrule': row['rrule'],
+            'exdate': _split_epochs(row['exdate']),
+            'rdate': _split_epochs(row['rdate']),
+            'recurrence_id': row['recurrence_id'],
+            'series': None,
+        }
@@ -0,0 +1,516 @@
+"""
+Incremental Claude Code usage aggregator
+
+Tails the JSONL transcripts under ~/.claude/projects from per-file byte
+offsets and folds assistant usage into persistent per-model,
+quarter-hour rollups. Budget totals are then sums over buckets instead of a rescan of
+every transcript line.
+
+Counting matches scripts/update-token-tracker.js: assistant messages
+only, input_tokens + output_tokens.
+
+A cold start (no checkpoints yet) goes through backfill(), which shards
+the transcripts across worker processes.
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .snapshot import publish_status
+
+HOUR = 3600
+MINUTE = 60
+# Rollup bucket width. Every UTC offset in use is a whole number of
+# quarter hours (India +5:30, Nepal +5:45), so local midnight and Monday
+# 00:00 always start a bucket and daily/weekly totals need no partial one
+QUARTER = 15 * MINUTE
+FIVE_HOURS = 5 * HOUR
+DEFAULT_WINDOW_LIMIT = 200000
+
+# Below this much transcript data a process pool costs more than it saves
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    "offset" INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    file_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    PRIMARY KEY (file_id, bucket, model)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rollups_bucket ON rollups (bucket);
+CREATE TABLE IF NOT EXISTS recent (
+    file_id INTEGER NOT NULL,
+    minute INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    PRIMARY KEY (file_id, minute, model)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_recent_minute ON recent (minute);
+"""
+
+# 'YYYY-MM-DDTHH' -> epoch of that UTC hour; transcripts repeat the same
+# hour prefix thousands of times, so parse it once
+_hour_cache: Dict[str, int] = {}
+
+
+def parse_timestamp(ts: str) -> Optional[int]:
+    """Epoch seconds for an ISO-8601 transcript timestamp"""
+    if len(ts) >= 20 and ts[-1] == 'Z' and ts[13] == ':' and ts[16] == ':':
+        prefix = ts[:13]
+        hour = _hour_cache.get(prefix)
+        if hour is None:
+            try:
+                hour = int(datetime.fromisoformat(prefix + ':00:00+00:00').timestamp())
+            except ValueError:
+                return None
+            _hour_cache[prefix] = hour
+        try:
+            return hour + int(ts[14:16]) * MINUTE + int(ts[17:19])
+        except ValueError:
+            return None
+    try:
+        return int(datetime.fromisoformat(ts).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_usage_line(line: bytes) -> Optional[Tuple[int, str, int, int]]:
+    """(timestamp, model, input_tokens, output_tokens) for an assistant line, else None"""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(entry, dict) or entry.get('type') != 'assistant':
+        return None
+    message = entry.get('message')
+    if not isinstance(message, dict):
+        return None
+    usage = message.get('usage')
+    timestamp = entry.get('timestamp')
+    # Malformed lines are skipped (like the Node tracker does) rather than
+    # raising, which would stop the checkpoint from ever moving past them
+    if not usage or not isinstance(usage, dict) or not isinstance(timestamp, str):
+        return None
+    timestamp = parse_timestamp(timestamp)
+    if timestamp is None:
+        return None
+    try:
+        input_tokens = int(usage.get('input_tokens') or 0)
+        output_tokens = int(usage.get('output_tokens') or 0)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    model = message.get('model')
+    return (
+        timestamp,
+        model if model and isinstance(model, str) else 'unknown',
+        input_tokens,
+        output_tokens,
+    )
+
+
+def is_usage_candidate(line: bytes) -> bool:
+    """Byte-level pre-filter so json.loads only runs on assistant lines with usage"""
+    return b'"usage"' in line and (b'"type":"assistant"' in line or b'"type": "assistant"' in line)
+
+
+def iter_usage_records(fp, offset: int) -> Iterator[Tuple[Optional[Tuple[int, str, int, int]], int]]:
+    """
+    Yield (record, end_offset) for each complete line after offset
+
+    record is None for lines without assistant usage. A trailing line
+    without a newline is still being written and is left for the next
+    pass; end_offset never moves past it.
+    """
+    fp.seek(offset)
+    position = offset
+    for line in fp:
+        if not line.endswith(b'\n'):
+            break
+        position += len(line)
+        yield (parse_usage_line(line) if is_usage_candidate(line) else None), position
+
+
+def scan_transcript(path: str, offset: int, recent_floor: int,
+                    on_record: Optional[Callable[[int, str, int], None]] = None) -> Dict:
+    """
+    Fold one transcript, from offset, into quarter-hour and per-minute buckets
+
+    Minute buckets are only kept for timestamps at or after recent_floor;
+    they feed the rolling 5-hour window. on_record(timestamp, model, tokens)
+    is called for each of those recent records.
+    """
+    rollups: Dict[Tuple[int, str], List[int]] = {}
+    recent: Dict[Tuple[int, str], int] = {}
+    lines = records = 0
+
+    with open(path, 'rb') as fp:
+        end = offset
+        for record, end in iter_usage_records(fp, offset):
+            lines += 1
+            if record is None:
+                continue
+            timestamp, model, input_tokens, output_tokens = record
+            bucket = rollups.setdefault((timestamp - timestamp % QUARTER, model), [0, 0])
+            bucket[0] += input_tokens
+            bucket[1] += output_tokens
+            if timestamp >= recent_floor:
+                key = (timestamp - timestamp % MINUTE, model)
+                recent[key] = recent.get(key, 0) + input_tokens + output_tokens
+                if on_record is not None:
+                    on_record(timestamp, model, input_tokens + output_tokens)
+            records += 1
+
+    return {'end': end, 'rollups': rollups, 'recent': recent, 'lines': lines, 'records': records}
+
+
+def _scan_shard(paths: List[str], recent_floor: int) -> List[Dict]:
+    """Backfill worker: stat and scan each file of a shard from the start"""
+    results = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            result = scan_transcript(path, 0, recent_floor)
+        except OSError:
+            continue
+        result.update(path=path, inode=st.st_ino, size=st.st_size, mtime_ns=st.st_mtime_ns)
+        results.append(result)
+    return results
+
+
+def shard_files(files: List[Tuple[str, int]], shards: int) -> List[List[str]]:
+    """Split (path, size) pairs into shards of similar total size, largest files first"""
+    heap = [(0, index) for index in range(shards)]
+    bins: List[List[str]] = [[] for _ in range(shards)]
+    for path, size in sorted(files, key=lambda item: item[1], reverse=True):
+        load, index = heapq.heappop(heap)
+        bins[index].append(path)
+        heapq.heappush(heap, (load + size, index))
+    return [shard for shard in bins if shard]
+
+
+def iter_transcript_files(projects_dir: Path) -> Iterator[str]:
+    """Every <project>/<session>.jsonl under the projects directory"""
+    try:
+        project_dirs = list(os.scandir(projects_dir))
+    except FileNotFoundError:
+        return
+    for project in project_dirs:
+        if not project.is_dir():
+            continue
+        for entry in os.scandir(project.path):
+            if entry.name.endswith('.jsonl'):
+                yield entry.path
+
+
+def week_start(now: datetime) -> datetime:
+    """Monday 00:00 local time of the current week"""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=today.weekday())
+
+
+class UsageAggregator:
+    """Persistent per-file checkpoints and per-model quarter-hour rollups in SQLite"""
+
+    def __init__(self, db_path: Path, projects_dir: Path):
+        self.db_path = db_path
+        self.projects_dir = projects_dir
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), isolation_level=None, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript(
+                'DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS rollups; DROP TABLE IF EXISTS recent;'
+            )
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def refresh(self, now: Optional[float] = None,
+                on_record: Optional[Callable[[int, str, int], None]] = None) -> Dict:
+        """
+        Tail every transcript from its checkpoint and fold new lines into the rollups
+
+        on_record(timestamp, model, tokens) sees each newly read record from
+        the last few hours (not called during a cold-start backfill).
+        """
+        now = time.time() if now is None else now
+        if self.conn.execute('SELECT 1 FROM files LIMIT 1').fetchone() is None:
+            return self.backfill(now=now)
+
+        stats = {'files': 0, 'tailed': 0, 'reset': 0, 'removed': 0, 'records': 0, 'bytes': 0}
+
+        seen = set()
+        for path in iter_transcript_files(self.projects_dir):
+            seen.add(path)
+            stats['files'] += 1
+            try:
+                self._tail_file(path, now, stats, on_record)
+            except OSError:
+                continue
+
+        known = self.conn.execute('SELECT id, path FROM files').fetchall()
+        for file_id, path in known:
+            if path not in seen:
+                self._drop_file(file_id, delete_checkpoint=True)
+                stats['removed'] += 1
+
+        self.conn.execute('DELETE FROM recent WHERE minute < ?', (int(now) - FIVE_HOURS - HOUR,))
+        return stats
+
+    def backfill(self, workers: Optional[int] = None, now: Optional[float] = None) -> Dict:
+        """
+        Rebuild every checkpoint and rollup from scratch
+
+        Files are sharded by size across a process pool; each worker
+        returns per-file partial buckets that are merged here in a single
+        transaction. Stats include throughput (MB/s, lines/s).
+        """
+        now = time.time() if now is None else now
+        recent_floor = int(now) - FIVE_HOURS - HOUR
+        started = time.perf_counter()
+
+        files = []
+        for path in iter_transcript_files(self.projects_dir):
+            try:
+                files.append((path, os.path.getsize(path)))
+            except OSError:
+                continue
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or sum(size for _, size in files) < PARALLEL_MIN_BYTES:
+            workers = 1
+            results = _scan_shard([path for path, _ in files], recent_floor)
+        else:
+            results = []
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # More shards than workers so one slow shard doesn't serialize the tail
+                for shard_results in pool.map(_scan_shard, shard_files(files, workers * 4), repeat(recent_floor)):
+                    results.extend(shard_results)
+        scanned = time.perf_counter() - started
+
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.conn.execute('DELETE FROM files')
+        self.conn.execute('DELETE FROM rollups')
+        self.conn.execute('DELETE FROM recent')
+        for result in results:
+            file_id = self.conn.execute(
+                'INSERT INTO files (path, inode, size, mtime_ns, "offset") VALUES (?, ?, ?, ?, ?)',
+                (result['path'], result['inode'], result['size'], result['mtime_ns'], result['end'])
+            ).lastrowid
+            self.conn.executemany(
+                'INSERT INTO rollups (file_id, bucket, model, input_tokens, output_tokens) VALUES (?, ?, ?, ?, ?)',
+                ((file_id, bucket, model, tokens[0], tokens[1]) for (bucket, model), tokens in result['rollups'].items())
+            )
+            self.conn.executemany(
+                'INSERT INTO recent (file_id, minute, model, tokens) VALUES (?, ?, ?, ?)',
+                ((file_id, minute, model, tokens) for (minute, model), tokens in result['recent'].items())
+            )
+        self.conn.execute('COMMIT')
+        elapsed = time.perf_counter() - started
+
+        total_bytes = sum(result['end'] for result in results)
+        total_lines = sum(result['lines'] for result in results)
+        return {
+            'files': len(files),
+            'tailed': len(results),
+            'reset': 0,
+            'removed': 0,
+            'records': sum(result['records'] for result in results),
+            'bytes': total_bytes,
+            'lines': total_lines,
+            'workers': workers,
+            'scan_seconds': scanned,
+            'seconds': elapsed,
+            'mb_per_s': total_bytes / 1e6 / scanned if scanned else 0.0,
+            'lines_per_s': total_lines / scanned if scanned else 0.0,
+        }
+
+    def _drop_file(self, file_id: int, delete_checkpoint: bool = False):
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.conn.execute('DELETE FROM rollups WHERE file_id = ?', (file_id,))
+        self.conn.execute('DELETE FROM recent WHERE file_id = ?', (file_id,))
+        if delete_checkpoint:
+            self.conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+        else:
+            self.conn.execute('UPDATE files SET size = 0, mtime_ns = 0, "offset" = 0 WHERE id = ?', (file_id,))
+        self.conn.execute('COMMIT')
+
+    def _tail_file(self, path: str, now: float, stats: Dict,
+                   on_record: Optional[Callable[[int, str, int], None]] = None):
+        st = os.stat(path)
+        row = self.conn.execute(
+            'SELECT id, inode, size, mtime_ns, "offset" FROM files WHERE path = ?', (path,)
+        ).fetchone()
+
+        if row and row[1] == st.st_ino and row[2] == st.st_size and row[3] == st.st_mtime_ns:
+            return
+
+        if row and (row[1] != st.st_ino or st.st_size < row[4]):
+            # Replaced or truncated: forget what this file contributed and start over
+            self._drop_file(row[0])
+            row = (row[0], st.st_ino, 0, 0, 0)
+            stats['reset'] += 1
+
+        offset = row[4] if row else 0
+        result = scan_transcript(path, offset, int(now) - FIVE_HOURS - HOUR, on_record)
+        stats['tailed'] += 1
+        stats['records'] += result['records']
+        stats['bytes'] += result['end'] - offset
+        self._commit_file(path, st, row[0] if row else None, offset, result['end'], result['rollups'], result['recent'])
+
+    def _commit_file(self, path: str, st: os.stat_result, file_id: Optional[int], start: int, offset: int,
+                     rollups: Dict[Tuple[int, str], List[int]], recent: Dict[Tuple[int, str], int]):
+        """
+        Write a file's new buckets and its checkpoint in one transaction
+
+        Skipped if another process moved the checkpoint since we read it,
+        so concurrent runs never count the same bytes twice.
+        """
+        self.conn.execute('BEGIN IMMEDIATE')
+        current = self.conn.execute('SELECT "offset" FROM files WHERE path = ?', (path,)).fetchone()
+        if (current[0] if current else None) != (start if file_id is not None else None):
+            self.conn.execute('ROLLBACK')
+            return
+        if file_id is None:
+            file_id = self.conn.execute(
+                'INSERT INTO files (path, inode, size, mtime_ns, "offset") VALUES (?, ?, ?, ?, ?)',
+                (path, st.st_ino, st.st_size, st.st_mtime_ns, offset)
+            ).lastrowid
+        else:
+            self.conn.execute(
+                'UPDATE files SET inode = ?, size = ?, mtime_ns = ?, "offset" = ? WHERE id = ?',
+                (st.st_ino, st.st_size, st.st_mtime_ns, offset, file_id)
+            )
+        self.conn.executemany(
+            'INSERT INTO rollups (file_id, bucket, model, input_tokens, output_tokens) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (file_id, bucket, model) DO UPDATE SET '
+            'input_tokens = input_tokens + excluded.input_tokens, '
+            'output_tokens = output_tokens + excluded.output_tokens',
+            ((file_id, bucket, model, tokens[0], tokens[1]) for (bucket, model), tokens in rollups.items())
+        )
+        self.conn.executemany(
+            'INSERT INTO recent (file_id, minute, model, tokens) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (file_id, minute, model) DO UPDATE SET tokens = tokens + excluded.tokens',
+            ((file_id, minute, model, tokens) for (minute, model), tokens in recent.items())
+        )
+        self.conn.execute('COMMIT')
+
+    def totals_since(self, since: float) -> Dict[str, int]:
+        """Tokens per model from the rollups at or after since (to the quarter hour)"""
+        rows = self.conn.execute(
+            'SELECT model, SUM(input_tokens + output_tokens) FROM rollups '
+            'WHERE bucket >= ? GROUP BY model',
+            (int(since) - int(since) % QUARTER,)
+        )
+        return {model: tokens for model, tokens in rows}
+
+    def hourly_usage(self, since: float, until: float) -> List[Tuple[int, int, int]]:
+        """(file_id, hour, tokens) usage per hour with since <= hour < until, all models combined"""
+        return self.conn.execute(
+            f'SELECT file_id, bucket - bucket % {HOUR} AS hour, SUM(input_tokens + output_tokens) FROM rollups '
+            'WHERE bucket >= ? AND bucket < ? GROUP BY file_id, hour',
+            (int(since) - int(since) % HOUR, -(-int(until) // HOUR) * HOUR)
+        ).fetchall()
+
+    def first_hour(self) -> Optional[int]:
+        """Oldest hour with any recorded usage"""
+        bucket = self.conn.execute('SELECT MIN(bucket) FROM rollups').fetchone()[0]
+        return None if bucket is None else bucket - bucket % HOUR
+
+    def file_projects(self) -> Dict[int, str]:
+        """Transcript file id -> project directory name (e.g. '-Users-me-code-organized-ai')"""
+        return {file_id: os.path.basename(os.path.dirname(path))
+                for file_id, path in self.conn.execute('SELECT id, path FROM files')}
+
+    def recent_buckets(self, since: float) -> List[Tuple[int, str, int]]:
+        """(minute, model, tokens) buckets at or after since, oldest first"""
+        return self.conn.execute(
+            'SELECT minute, model, SUM(tokens) FROM recent WHERE minute >= ? '
+            'GROUP BY minute, model ORDER BY minute',
+            (int(since) - int(since) % MINUTE,)
+        ).fetchall()
+
+    def rolling_window(self, now: Optional[float] = None) -> Tuple[int, Optional[int]]:
+        """(tokens used, oldest minute) over the trailing five hours, to the minute"""
+        now = time.time() if now is None else now
+        used, oldest = self.conn.execute(
+            'SELECT COALESCE(SUM(tokens), 0), MIN(minute) FROM recent WHERE minute > ?',
+            (int(now) - FIVE_HOURS,)
+        ).fetchone()
+        return used, oldest
+
+    def budget_status(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> Dict:
+        """Budget in the token-tracker.json layout, computed from the rollups"""
+        now = now or datetime.now()
+        weekly_start = week_start(now)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        weekly = self.totals_since(weekly_start.timestamp())
+        daily = self.totals_since(today_start.timestamp())
+        used, oldest = self.rolling_window(now.timestamp())
+
+        return {
+            'lastUpdated': iso_timestamp(time.time()),
+            'weekStart': iso_timestamp(weekly_start.timestamp()),
+            'todayStart': iso_timestamp(today_start.timestamp()),
+            'weekly': {'total': sum(weekly.values()), 'byModel': _sorted_desc(weekly), 'limits': {}},
+            'daily': {'total': sum(daily.values()), 'byModel': _sorted_desc(daily)},
+            'fiveHourWindow': five_hour_window(used, oldest, limit),
+        }
+
+    def publish_status(self, snapshot_path: str, limit: Optional[int] = None) -> Dict:
+        """budget_status(), also published as the snapshot that 'status' answers from"""
+        status = self.budget_status(limit=limit)
+        publish_status(snapshot_path, status, time.time())
+        return status
+
+
+def five_hour_window(used: int, oldest: Optional[int], limit: Optional[int] = None) -> Dict:
+    """The fiveHourWindow section of the tracker layout"""
+    limit = limit or DEFAULT_WINDOW_LIMIT
+    window = {'limit': limit, 'used': used, 'remaining': max(limit - used, 0)}
+    if oldest is not None:
+        window['resetTime'] = iso_timestamp(oldest + FIVE_HOURS)
+    return window
+
+
+def _sorted_desc(by_model: Dict[str, int]) -> Dict[str, int]:
+    return dict(sorted(by_model.items(), key=lambda item: item[1], reverse=True))
+
+
+def iso_timestamp(epoch: float) -> str:
+    """JavaScript-style toISOString() for consistency with the Node tracker"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.') + f"{int(epoch * 1000) % 1000:03d}Z"
+
+
+def read_window_limit(claude_dir: Path) -> Optional[int]:
+    """5-hour limit from quota-tracker.json, if the user keeps one"""
+    quota_path = claude_dir / 'quota-tracker.json'
+    try:
+        return int(json.loads(quota_path.read_text()).get('limit') or 0) or None
+    except (OSError, ValueError, AttributeError):
+        return None